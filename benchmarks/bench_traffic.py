@@ -0,0 +1,67 @@
+
+"""
+Compares the per-sprite Traffic.update loop with the vectorized
+TrafficSystem.step for a growing number of cars.
+
+Run from the project root:
+    python benchmarks/bench_traffic.py [--ticks 300] [--counts 45 500 5000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pygame
+
+from src.core import generator
+from src.entities import traffic
+
+def time_legacy(count, ticks):
+    group = pygame.sprite.Group()
+    for _ in range(count):
+        group.add(traffic.Traffic())
+    start = time.perf_counter()
+    for _ in range(ticks):
+        group.update(0, 0)
+    return (time.perf_counter() - start) / ticks
+
+def time_system(count, ticks):
+    system = traffic.TrafficSystem(count, np.random.default_rng(0))
+    start = time.perf_counter()
+    for _ in range(ticks):
+        system.step()
+    return (time.perf_counter() - start) / ticks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=300)
+    parser.add_argument("--counts", type=int, nargs="+", default=[45, 500, 5000])
+    parser.add_argument("--seed", default="101")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((1280, 720))
+    generator.generate_map(args.seed)
+    traffic.initialize()
+
+    print(f"{'cars':>6} {'legacy ms/tick':>15} {'system ms/tick':>15} {'speedup':>8}")
+    for count in args.counts:
+        random.seed(0)
+        legacy = time_legacy(count, args.ticks)
+        system = time_system(count, args.ticks)
+        print(f"{count:>6} {legacy * 1000:>15.3f} {system * 1000:>15.3f} {legacy / system:>7.1f}x")
+
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
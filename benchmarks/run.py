@@ -0,0 +1,275 @@
+
+"""
+Reproducible benchmark suite for the simulation and the renderer.
+
+The generate group times the road network generator at 10x10 and
+128x128 next to the original random walk (walk_map), and the batched
+generator used by seed sweeps (grow_maps, per map). The collisions group
+grows the map with the car count, so every count sees equally busy roads.
+
+Every case runs under the SDL dummy driver with fixed seeds and reports
+milliseconds per operation (lower is better), the best of several
+repeats. Results are written as JSON and compared against a stored
+baseline; any case slower than the baseline by more than the tolerance
+is a regression and the run exits with status 1.
+
+Run from the project root:
+    python benchmarks/run.py                     # run and compare with benchmarks/baseline.json
+    python benchmarks/run.py --save-baseline     # record a new baseline on this machine
+    python benchmarks/run.py --only traffic render --tolerance 0.5
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import platform
+import argparse
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+import pygame
+
+from src.core import generator
+from src.core.settings import MAP_SIZE, TRAFFIC_COUNT
+from src.core.simulation import Simulation
+from src.core.drivers import ScriptedDriver
+from src.entities import traffic
+from src.ui.game_view import GameView
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS = os.path.join(BENCH_DIR, "results.json")
+
+SEED = "101"
+CAR_COUNTS = (45, 500, 5000)
+RESOLUTIONS = ((800, 600), (1024, 768), (1280, 720))
+DRIVER = "U:120,UL:40,U:80,UR:40"
+TOLERANCE = 0.4      # allowed slowdown against the baseline, as a fraction
+NOISE_FLOOR = 0.02   # ms, differences below this are never regressions
+MIN_SAMPLE = 0.25    # seconds timed per repeat, at least
+
+#Best milliseconds per operation over repeats runs. Each run calls
+#fn(state, ops) until at least MIN_SAMPLE seconds have passed so that
+#short cases are not lost in timer and scheduler noise.
+def measure(fn, ops, repeats, setup = None):
+    samples = []
+    for _ in range(repeats):
+        state = setup() if setup else None
+        done = 0
+        start = time.perf_counter()
+        while True:
+            fn(state, ops)
+            done += ops
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_SAMPLE:
+                break
+        samples.append(elapsed * 1000.0 / done)
+    return min(samples)
+
+def use_display(size):
+    pygame.display.set_mode(size)
+    traffic.initialize()
+
+def bench_generate(repeats):
+    def run(state, ops):
+        for i in range(ops):
+            generator.generate_map(f"bench-{i}", use_cache=False)
+    def load(state, ops):
+        for _ in range(ops):
+            generator.generate_map(SEED)
+    def grow_large(state, ops):
+        for i in range(ops):
+            generator.grow_map(f"bench-{i}", 128)
+    # the original random walk, for comparison
+    def walk(state, ops):
+        for i in range(ops):
+            generator.walk_map(f"bench-{i}", 10)
+    def grow_batch(state, ops):
+        generator.grow_maps([f"bench-{i}" for i in range(ops)], 10)
+    def walk_large(state, ops):
+        for i in range(ops):
+            generator.walk_map(f"bench-{i}", 128)
+    result = {"generate_map": measure(run, 20, repeats),
+              "generate_map_128": measure(grow_large, 2, repeats),
+              "grow_maps": measure(grow_batch, 200, repeats),
+              "walk_map": measure(walk, 20, repeats),
+              "walk_map_128": measure(walk_large, 2, repeats)}
+    generator.generate_map(SEED)
+    result["map_cache_load"] = measure(load, 20, repeats)
+    return result
+
+def bench_traffic(repeats):
+    results = {}
+    for count in CAR_COUNTS:
+        def legacy_setup():
+            random.seed(0)
+            return pygame.sprite.Group([traffic.Traffic() for _ in range(count)])
+        def legacy_run(group, ops):
+            for _ in range(ops):
+                group.update(0, 0)
+        results[f"traffic_legacy_{count}"] = measure(legacy_run, 50, repeats, legacy_setup)
+
+        def system_setup():
+            return traffic.TrafficSystem(count, np.random.default_rng(0))
+        def system_run(system, ops):
+            for _ in range(ops):
+                system.step()
+        results[f"traffic_system_{count}"] = measure(system_run, 200, repeats, system_setup)
+    return results
+
+#Map side that gives count cars the road density of the default map
+#with TRAFFIC_COUNT cars, so collision cases compare equally busy roads.
+def map_size_for(count):
+    return max(MAP_SIZE, math.ceil(MAP_SIZE * math.sqrt(count / TRAFFIC_COUNT)))
+
+def bench_collisions(repeats):
+    results = {}
+    for count in CAR_COUNTS:
+        generator.generate_map(SEED, map_size_for(count), use_cache=False)
+        def setup():
+            system = traffic.TrafficSystem(count, np.random.default_rng(0))
+            for _ in range(60):
+                system.step()
+            # a car-sized probe over every car, like the player's check
+            probes = [system.rect(i) for i in range(0, count, max(1, count // 45))]
+            return system, probes
+        def query(state, ops):
+            system, probes = state
+            for i in range(ops):
+                system.collide(probes[i % len(probes)])
+        def pairs(state, ops):
+            system = state[0]
+            for _ in range(ops):
+                system.collisions()
+        results[f"collide_{count}"] = measure(query, 500, repeats, setup)
+        results[f"collisions_{count}"] = measure(pairs, 5, repeats, setup)
+    generator.generate_map(SEED)
+    return results
+
+def bench_render(repeats):
+    results = {}
+    for size in RESOLUTIONS:
+        use_display(size)
+        screen = pygame.display.get_surface()
+        def setup():
+            random.seed(0)
+            sim = Simulation(size)
+            view = GameView(sim, size)
+            driver = ScriptedDriver.parse(DRIVER)
+            # let the chunk cache fill before timing
+            for _ in range(30):
+                sim.step(driver(sim))
+                view.draw(screen)
+            return sim, view, driver
+        def run(state, ops):
+            sim, view, driver = state
+            for _ in range(ops):
+                sim.step(driver(sim))
+                view.draw(screen, 0.5)
+                pygame.display.flip()
+        results[f"render_{size[0]}x{size[1]}"] = measure(run, 120, repeats, setup)
+    use_display(RESOLUTIONS[-1])
+    return results
+
+GROUPS = {
+    "generate": bench_generate,
+    "traffic": bench_traffic,
+    "collisions": bench_collisions,
+    "render": bench_render,
+}
+
+def run_suite(groups, repeats):
+    pygame.init()
+    use_display(RESOLUTIONS[-1])
+    generator.generate_map(SEED)
+
+    results = {}
+    for name in groups:
+        print(f"running {name} ...", flush=True)
+        results.update(GROUPS[name](repeats))
+    pygame.quit()
+    return results
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+#Cases slower than the baseline by more than tolerance, as (name, base, now).
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, now in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if now > base * (1.0 + tolerance) and now - base > NOISE_FLOOR:
+            regressions.append((name, base, now))
+    return regressions
+
+def report(results, baseline):
+    print(f"{'case':<24}{'ms/op':>12}{'baseline':>12}{'change':>9}")
+    for name, now in sorted(results.items()):
+        base = baseline.get(name)
+        if base:
+            print(f"{name:<24}{now:>12.4f}{base:>12.4f}{(now / base - 1) * 100:>8.1f}%")
+        else:
+            print(f"{name:<24}{now:>12.4f}{'-':>12}{'':>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(GROUPS), default=list(GROUPS),
+                        help="benchmark groups to run")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed slowdown as a fraction (0.4 = 40%%)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--output", default=RESULTS)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    results = run_suite(args.only, args.repeats)
+    document = {"environment": environment(), "seed": SEED, "results": results}
+
+    with open(args.output, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+        report(results, {})
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    else:
+        print(f"No baseline at {args.baseline}, run with --save-baseline first.")
+    report(results, baseline)
+    print(f"Results written to {args.output}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nREGRESSION: {len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}")
+        for name, base, now in regressions:
+            print(f"  {name}: {base:.4f} -> {now:.4f} ms/op")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+
+"""
+Many headless runs in parallel, for tuning the gameplay constants.
+A job is one seed played by one driver for a number of ticks, optionally
+with some constants from settings.py overridden. Jobs are spread over a
+process pool; each worker runs its simulations with the SDL dummy
+drivers and sends back the run's stats.
+
+A job that raises is reported as failed. A worker that dies outright
+(a crash in SDL, the OOM killer) breaks the whole pool: the pool is then
+rebuilt and the unfinished jobs are submitted again. Workers mark the
+jobs they start in shared memory, so only jobs that were running when
+the pool broke use up one of their retries and one bad job never loses
+the batch.
+"""
+
+import os
+import sys
+import time
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from src.core import settings
+from src.core.settings import TRAFFIC_COUNT, MAP_SIZE
+
+# Job states shared with the workers
+QUEUED = 0
+RUNNING = 1
+
+# Stats summed over the jobs of a group
+SUMMED = ("ticks", "rounds", "score", "flags", "crashes", "offroad_ticks", "seconds")
+
+#One headless run. overrides maps settings.py names to values.
+class Job:
+    def __init__(self, seed, driver, ticks, traffic_count = None, map_size = MAP_SIZE,
+                 overrides = None):
+        self.seed = str(seed)
+        self.driver = driver
+        self.ticks = ticks
+        self.overrides = dict(overrides or {})
+        if traffic_count is None:
+            traffic_count = self.overrides.get("TRAFFIC_COUNT", TRAFFIC_COUNT)
+        self.traffic_count = traffic_count
+        self.map_size = map_size
+        for name in self.overrides:
+            if not hasattr(settings, name) or not name.isupper():
+                raise ValueError(f"unknown setting {name}")
+
+    #Jobs sharing a key are aggregated together.
+    def key(self):
+        overrides = ",".join(f"{k}={v}" for k, v in sorted(self.overrides.items()))
+        return (self.driver, self.traffic_count, overrides)
+
+#Every combination of seeds, drivers and override sets.
+def make_jobs(seeds, drivers, ticks, override_sets = ({},), traffic_count = None,
+              map_size = MAP_SIZE):
+    return [Job(seed, driver, ticks, traffic_count, map_size, overrides)
+            for overrides, driver, seed in itertools.product(override_sets, drivers, seeds)]
+
+#Set constants in settings and in every loaded module that copied them
+#with a from-import. Returns the previous values, to undo with the same
+#call. Only used inside worker processes.
+def apply_overrides(overrides):
+    previous = {name: getattr(settings, name) for name in overrides}
+    for module in list(sys.modules.values()):
+        if module is settings or getattr(module, "__name__", "").startswith("src."):
+            for name, value in overrides.items():
+                if hasattr(module, name):
+                    setattr(module, name, value)
+    return previous
+
+job_states = None
+
+def init_worker(states):
+    global job_states
+    job_states = states
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    # asset and map loading chatter, errors come back with the results
+    sys.stdout = open(os.devnull, "w")
+
+#Worker entry point. Overrides are undone afterwards, workers are reused.
+def run_job(job, index):
+    from src.core.simulation import run_headless
+    from src.core.drivers import make_driver
+
+    job_states[index] = RUNNING
+    previous = apply_overrides(job.overrides)
+    try:
+        return run_headless(job.seed, job.ticks, make_driver(job.driver, job.seed),
+                            traffic_count=job.traffic_count, map_size=job.map_size)
+    finally:
+        apply_overrides(previous)
+
+#Run jobs over a pool of worker processes (one per core by default).
+#Returns (results, failures): results[i] is the stats dict of jobs[i],
+#or None if it failed; failures maps job index to the error text.
+#progress, if given, is called as progress(done, total) after each job.
+def run_batch(jobs, workers = None, retries = 1, progress = None):
+    workers = workers or os.cpu_count() or 1
+    results = [None] * len(jobs)
+    failures = {}
+    attempts = [0] * len(jobs)
+    states = multiprocessing.RawArray("b", len(jobs))
+    pending = list(range(len(jobs)))
+    done = 0
+
+    while pending:
+        broken = []
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(states,)) as pool:
+            futures = {}
+            for i in pending:
+                states[i] = QUEUED
+                futures[pool.submit(run_job, jobs[i], i)] = i
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except BrokenProcessPool:
+                    broken.append(i)
+                    continue
+                except Exception as e:
+                    failures[i] = f"{type(e).__name__}: {e}"
+                done += 1
+                if progress:
+                    progress(done, len(jobs))
+
+        # Jobs still queued when the pool broke are not to blame
+        pending = []
+        for i in broken:
+            if states[i] == RUNNING:
+                attempts[i] += 1
+            if attempts[i] > retries:
+                failures[i] = "worker process died"
+                done += 1
+                if progress:
+                    progress(done, len(jobs))
+            else:
+                pending.append(i)
+    return results, failures
+
+#Stats of finished jobs grouped by Job.key(), with per-job means.
+def aggregate(jobs, results):
+    groups = {}
+    for job, stats in zip(jobs, results):
+        if stats is None:
+            continue
+        group = groups.setdefault(job.key(), dict.fromkeys(SUMMED, 0))
+        group["jobs"] = group.get("jobs", 0) + 1
+        for name in SUMMED:
+            group[name] += stats[name]
+
+    for group in groups.values():
+        ticks = group["ticks"]
+        group["flags_per_job"] = group["flags"] / group["jobs"]
+        group["crashes_per_job"] = group["crashes"] / group["jobs"]
+        group["score_per_round"] = group["score"] / group["rounds"]
+        group["offroad_fraction"] = group["offroad_ticks"] / ticks if ticks else 0.0
+        group["ticks_per_second"] = ticks / group["seconds"] if group["seconds"] > 0 else 0.0
+    return groups
+
+#Run a batch and time it.
+def run(jobs, workers = None, retries = 1, progress = None):
+    start = time.perf_counter()
+    results, failures = run_batch(jobs, workers, retries, progress)
+    wall = time.perf_counter() - start
+
+    ticks = sum(stats["ticks"] for stats in results if stats)
+    summary = {
+        "jobs": len(jobs),
+        "failed": len(failures),
+        "wall_seconds": wall,
+        "ticks": ticks,
+        "ticks_per_second": ticks / wall if wall > 0 else 0.0,
+    }
+    return summary, aggregate(jobs, results), failures
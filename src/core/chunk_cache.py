@@ -0,0 +1,80 @@
+
+from collections import OrderedDict
+
+import pygame
+from src.core.settings import CHUNK_BUDGET, COLOR_BG
+from src.data import maps
+
+#Caches the static road layer as pre-composited chunk surfaces.
+#Chunks are the size of the viewport and aligned to a grid of that size,
+#so the whole background is at most four (usually one or two) blits.
+#Chunks are baked on demand and evicted least-recently-used once the
+#memory budget is exceeded.
+class ChunkCache:
+    def __init__(self, renderer, chunk_size, budget = CHUNK_BUDGET):
+        self.renderer = renderer
+        self.chunk_w, self.chunk_h = chunk_size
+        self.budget = budget
+        self.chunks = OrderedDict()
+        self.revision = maps.revision
+        self.builds = 0
+
+    #Bytes used by a single chunk surface.
+    def chunk_bytes(self):
+        return self.chunk_w * self.chunk_h * 4
+
+    def memory_used(self):
+        return len(self.chunks) * self.chunk_bytes()
+
+    #Drop every baked chunk, e.g. after a new map was generated.
+    def invalidate(self):
+        self.chunks.clear()
+
+    #Bake the background of chunk (cx, cy).
+    def build_chunk(self, cx, cy):
+        chunk = pygame.Surface((self.chunk_w, self.chunk_h))
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert()
+        chunk.fill(COLOR_BG)
+        self.renderer.draw(chunk, cx * self.chunk_w, cy * self.chunk_h)
+        self.builds += 1
+        return chunk
+
+    #Fetch a chunk, building it if needed and marking it most recently used.
+    def get_chunk(self, cx, cy):
+        key = (cx, cy)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.build_chunk(cx, cy)
+            self.chunks[key] = chunk
+            self.evict()
+        else:
+            self.chunks.move_to_end(key)
+        return chunk
+
+    #Evict least recently used chunks until the cache fits the budget.
+    #The four chunks a single frame can need are always kept.
+    def evict(self):
+        limit = max(4, self.budget // self.chunk_bytes())
+        while len(self.chunks) > limit:
+            self.chunks.popitem(last = False)
+
+    #Blit the background for a camera at cam_x, cam_y onto surface.
+    def draw(self, surface, cam_x, cam_y):
+        if self.revision != maps.revision:
+            self.renderer.load_map()
+            self.invalidate()
+            self.revision = maps.revision
+
+        view_w, view_h = surface.get_size()
+        cam_x = int(cam_x)
+        cam_y = int(cam_y)
+        first_x = cam_x // self.chunk_w
+        first_y = cam_y // self.chunk_h
+        last_x = (cam_x + view_w - 1) // self.chunk_w
+        last_y = (cam_y + view_h - 1) // self.chunk_h
+
+        for cx in range(first_x, last_x + 1):
+            for cy in range(first_y, last_y + 1):
+                chunk = self.get_chunk(cx, cy)
+                surface.blit(chunk, (cx * self.chunk_w - cam_x, cy * self.chunk_h - cam_y))
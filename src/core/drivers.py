@@ -0,0 +1,114 @@
+
+"""
+Input drivers for headless runs.
+A driver is called once per tick with the Simulation and returns the
+input bitmask for that tick.
+"""
+
+import math
+import random
+import argparse
+
+from src.core.simulation import INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT
+
+KEY_BITS = {"U": INPUT_UP, "D": INPUT_DOWN, "L": INPUT_LEFT, "R": INPUT_RIGHT}
+
+#Replays a looping list of (ticks, bitmask) segments.
+class ScriptedDriver:
+    def __init__(self, segments):
+        self.segments = [(ticks, mask) for ticks, mask in segments if ticks > 0]
+        self.index = 0
+        self.left = self.segments[0][0] if self.segments else 0
+
+    #Build from text such as "U:120,UL:30,-:10" ("-" means no keys).
+    #Raises ValueError naming the first bad segment.
+    @classmethod
+    def parse(cls, text):
+        segments = []
+        for part in text.split(","):
+            keys, sep, ticks = part.strip().partition(":")
+            if not sep:
+                raise ValueError(f'bad driver segment "{part}", expected KEYS:TICKS such as U:120')
+            try:
+                ticks = int(ticks)
+            except ValueError:
+                raise ValueError(f'bad tick count in driver segment "{part}"')
+            mask = 0
+            for key in keys.strip().upper():
+                if key == "-":
+                    continue
+                if key not in KEY_BITS:
+                    raise ValueError(f'unknown key "{key}" in driver segment "{part}", '
+                                     f'use {", ".join(KEY_BITS)} or -')
+                mask |= KEY_BITS[key]
+            segments.append((ticks, mask))
+        return cls(segments)
+
+    def __call__(self, sim):
+        if not self.segments:
+            return 0
+        if self.left == 0:
+            self.index = (self.index + 1) % len(self.segments)
+            self.left = self.segments[self.index][0]
+        self.left -= 1
+        return self.segments[self.index][1]
+
+#Holds a random combination of keys for a random number of ticks.
+class RandomDriver:
+    def __init__(self, seed = 0, min_hold = 10, max_hold = 90):
+        self.rng = random.Random(seed)
+        self.min_hold = min_hold
+        self.max_hold = max_hold
+        self.mask = 0
+        self.left = 0
+
+    def __call__(self, sim):
+        if self.left == 0:
+            self.mask = INPUT_UP if self.rng.random() < 0.8 else 0
+            self.mask |= self.rng.choice([0, 0, INPUT_LEFT, INPUT_RIGHT])
+            if self.rng.random() < 0.05:
+                self.mask |= INPUT_DOWN
+            self.left = self.rng.randint(self.min_hold, self.max_hold)
+        self.left -= 1
+        return self.mask
+
+#Steers straight for the flag, easing off the throttle in sharp turns.
+#Ignores roads and traffic, a baseline for the scoring constants rather
+#than a good driver.
+class ChaseDriver:
+    def __init__(self, dead_zone = 4.0, sharp_turn = 60.0):
+        self.dead_zone = dead_zone
+        self.sharp_turn = sharp_turn
+
+    def __call__(self, sim):
+        car, target = sim.car, sim.target
+        dx = target.x + target.rect.width / 2 - (car.x + car.rect.centerx)
+        dy = target.y + target.rect.height / 2 - (car.y + car.rect.centery)
+        # the car moves along (cos(270 - dir), sin(270 - dir))
+        wanted = 270.0 - math.degrees(math.atan2(dy, dx))
+        turn = (wanted - car.dir + 180.0) % 360.0 - 180.0
+
+        mask = 0
+        if turn > self.dead_zone:
+            mask |= INPUT_LEFT
+        elif turn < -self.dead_zone:
+            mask |= INPUT_RIGHT
+        if abs(turn) < self.sharp_turn or car.speed < car.maxspeed / 3:
+            mask |= INPUT_UP
+        return mask
+
+#Driver from a command line spec: "random", "chase" or a script.
+def make_driver(spec, seed = 0):
+    if spec == "random":
+        return RandomDriver(seed)
+    if spec == "chase":
+        return ChaseDriver()
+    return ScriptedDriver.parse(spec)
+
+#argparse type for driver specs, so a bad one is a usage error.
+def driver_spec(text):
+    try:
+        make_driver(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f'{e} (drivers are "random", "chase" or a script)')
+    return text
@@ -1,34 +1,318 @@
 
 import random
+import argparse
+import numpy as np
+from src.core.settings import MAP_SIZE, MIN_MAP_SIZE
+from src.core import map_store
 from src.data import maps
 
-def generate_map(seed):
-    """
-    Generates a procedural map based on the given seed.
-    Updates maps.map_1 and maps.map_1_rot in place.
-    """
+# Bump whenever the same seed would produce a different map, so stale
+# cached maps are ignored.
+GENERATOR_VERSION = 2
+
+# Road network shape
+ROAD_COVERAGE = 0.45    # fraction of the cells that become road
+GROWTH_CHANCE = 0.5     # chance a cell next to the network joins it per round
+LOOP_CHANCE = 0.12      # chance two neighbouring unlinked roads get linked
+DEAD_END_FIX = 0.8      # chance a dead end links to another neighbouring road
+
+# Socket bit, (dx, dy) step and opposite socket of each side
+SIDES = (maps.NORTH, maps.WEST, maps.SOUTH, maps.EAST)
+STEPS = ((0, -1), (-1, 0), (0, 1), (1, 0))
+OPPOSITE = (maps.SOUTH, maps.EAST, maps.NORTH, maps.WEST)
+
+#Rotate a socket mask rot quarter turns counter-clockwise.
+def rotate_sockets(mask, rot):
+    rot %= 4
+    return ((mask << rot) | (mask >> (4 - rot))) & 15
+
+#(tile type, rotation) showing each of the 16 socket masks.
+def mask_tiles():
+    table = np.full((16, 2), -1, dtype=np.int8)
+    for tile_type, base in enumerate(maps.sockets):
+        for rot in range(4):
+            mask = rotate_sockets(base, rot)
+            if table[mask, 0] < 0:
+                table[mask] = tile_type, rot
+    return table
+
+MASK_TILES = mask_tiles()
+
+# Socket mask of each tile type at each rotation
+SOCKET_MASKS = np.array([[rotate_sockets(base, rot) for rot in range(4)]
+                         for base in maps.sockets], dtype=np.uint8)
+
+#Socket masks of a whole map given as tile type / rotation arrays.
+def socket_masks(tiles, rots):
+    return SOCKET_MASKS[tiles, rots % 4]
+
+#Make grid / rot the current map and index its cells for spawning.
+#indexes is (cells_by_type, road_cells) when already known.
+def install_map(grid, rot, indexes = None):
+    maps.map_1 = grid
+    maps.map_1_rot = rot
+    maps.size = len(grid)
+    if indexes is None:
+        build_indexes()
+    else:
+        maps.cells_by_type, maps.road_cells = indexes
+    maps.revision += 1
+
+#Group the cells of the current map by tile type, as (x, y) arrays
+#indexed like the renderer (maps.map_1[x][y]).
+def build_indexes():
+    tiles = np.array(maps.map_1, dtype=np.int8)
+    maps.cells_by_type = dict((tile_type, np.argwhere(tiles == tile_type))
+                              for tile_type in range(len(maps.map_tile)))
+    maps.road_cells = np.argwhere(tiles != maps.null)
+
+#Candidate cells for the given tile types (any road tile if None).
+#Falls back to every road cell, then to the middle of the map, so the
+#result is never empty.
+def spawn_cells(types = None):
+    if maps.road_cells is None:
+        build_indexes()
+    if types is not None:
+        found = [maps.cells_by_type[t] for t in types if len(maps.cells_by_type.get(t, ()))]
+        if found:
+            return np.concatenate(found) if len(found) > 1 else found[0]
+    if len(maps.road_cells):
+        return maps.road_cells
+    return np.array([[maps.size // 2, maps.size // 2]])
+
+#Random (x, y) cell of one of the given tile types, in O(1).
+#An exclude cell is redrawn unless it is the only candidate.
+def random_cell(types = None, rng = random, exclude = None):
+    cells = spawn_cells(types)
+    while True:
+        x, y = cells[rng.randrange(len(cells))]
+        cell = int(x), int(y)
+        if cell != exclude or len(cells) == 1:
+            return cell
+
+def seed_random(seed):
     try:
         random.seed(int(seed))
     except ValueError:
         # If seed is not an integer (e.g. text), use hash
         random.seed(seed)
+
+def generate_map(seed, size = MAP_SIZE, use_cache = True):
+    """
+    Installs the size x size map for the given seed, from the map cache
+    when it has been generated before.
+    Updates maps.map_1, maps.map_1_rot and maps.size in place.
+    """
+    cached = map_store.load(seed, size, GENERATOR_VERSION) if use_cache else None
+    if cached is not None:
+        grid, rot, cells_by_type, road_cells = cached
+        install_map(grid.tolist(), rot.tolist(), (cells_by_type, road_cells))
+        print(f"Map loaded with seed: {seed}")
+    else:
+        new_map, new_rot = grow_map(seed, size)
+        # Update the global maps data. Spawns sample the new indexes and the
+        # chunk cache rebuilds itself once it sees the new revision.
+        install_map(new_map, new_rot)
+        if use_cache:
+            map_store.save(seed, GENERATOR_VERSION, new_map, new_rot,
+                           maps.cells_by_type, maps.road_cells)
+        print(f"Map generated with seed: {seed}")
+
+    # Same random state whether the map was generated or loaded
+    seed_random(seed)
+
+#Integer state for numpy generators, taken from the seed the same way
+#seed_random() takes it.
+def seed_state(seed):
+    try:
+        seed = int(seed)
+    except ValueError:
+        pass
+    return random.Random(seed).getrandbits(64)
+
+#a shifted so that out[x, y] == a[x + dx, y + dy], zero off the grid.
+#Works on stacks of grids too, the last two axes are x and y.
+def shift(a, dx, dy):
+    out = np.zeros_like(a)
+    w, h = a.shape[-2:]
+    out[..., max(0, -dx):w - max(0, dx), max(0, -dy):h - max(0, dy)] = \
+        a[..., max(0, dx):w - max(0, -dx), max(0, dy):h - max(0, -dy)]
+    return out
+
+#Link every chosen cell to its neighbour on side i, on both ends.
+def link(mask, chosen, i):
+    dx, dy = STEPS[i]
+    mask[chosen] |= SIDES[i]
+    mask[shift(chosen, -dx, -dy)] |= OPPOSITE[i]
+
+#Pick one side per cell among the allowed ones, -1 where none is.
+#allowed is a (4, w, h) boolean array.
+def pick_side(rng, allowed):
+    return best_side(rng.random(allowed.shape) * allowed)
+
+#Side with the highest score along the first axis, -1 where all are 0.
+def best_side(scores):
+    side = scores.argmax(0)
+    side[scores.max(0) == 0] = -1
+    return side
+
+#Maps below MIN_MAP_SIZE have no room for a road around the center, so
+#the player, the flag and traffic would all start on grass.
+def check_size(size):
+    if size < MIN_MAP_SIZE:
+        raise ValueError(f"map size must be at least {MIN_MAP_SIZE}, got {size}")
+
+#argparse type for map sizes.
+def map_size_arg(text):
+    try:
+        size = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid map size: {text}")
+    try:
+        check_size(size)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return size
+
+def grow_map(seed, size):
+    """
+    Builds a size x size road network that is connected and whose tiles
+    agree with their neighbours on every side.
+    The network grows from the middle: each round, a random share of the
+    cells next to it join by linking to one of their road neighbours,
+    until ROAD_COVERAGE is reached. This spanning tree gets a few extra
+    links for loops and fewer dead ends. Each road cell's links then give
+    its socket mask, and MASK_TILES turns the mask into a tile type and
+    rotation. Every mask is some tile, so no socket is left unmatched.
+    Grids are indexed [x][y] like the renderer.
+    Returns the tile type and rotation grids.
+    """
+    check_size(size)
+    rng = np.random.default_rng(seed_state(seed))
+    shape = (size, size)
+    road = np.zeros(shape, dtype=bool)
+    mask = np.zeros(shape, dtype=np.uint8)
+    road[size // 2, size // 2] = True
+    count = 1
+    target = max(1, int(size * size * ROAD_COVERAGE))
+
+    while count < target:
+        neighbours = np.array([shift(road, dx, dy) for dx, dy in STEPS])
+        side = pick_side(rng, neighbours)
+        join = ~road & (side >= 0) & (rng.random(shape) < GROWTH_CHANCE)
+        joined = np.flatnonzero(join)
+        if len(joined) > target - count:
+            join[:] = False
+            join.flat[rng.choice(joined, target - count, replace=False)] = True
+        for i in range(4):
+            link(mask, join & (side == i), i)
+        road |= join
+        count += int(join.sum())
+
+    # Loops between neighbouring roads, each pair considered once
+    for i in (2, 3):
+        dx, dy = STEPS[i]
+        unlinked = road & shift(road, dx, dy) & ((mask & SIDES[i]) == 0)
+        link(mask, unlinked & (rng.random(shape) < LOOP_CHANCE), i)
+
+    # Most dead ends continue into another neighbouring road
+    dead = road & (np.isin(mask, SIDES)) & (rng.random(shape) < DEAD_END_FIX)
+    free = np.array([shift(road, dx, dy) & ((mask & bit) == 0)
+                     for (dx, dy), bit in zip(STEPS, SIDES)])
+    side = pick_side(rng, free)
+    for i in range(4):
+        link(mask, dead & (side == i), i)
+
+    tiles = MASK_TILES[mask]
+    return tiles[:, :, 0].tolist(), tiles[:, :, 1].tolist()
+
+#Random arrays of the given shape, one per generator, stacked on axis 1
+#so they line up with (4, n, w, h) side arrays.
+def draw(rngs, shape, axis = 0):
+    return np.stack([rng.random(shape) for rng in rngs], axis=axis)
+
+def grow_maps(seeds, size):
+    """
+    grow_map for many seeds at once, for seed sweeps.
+    Every seed keeps its own generator and draws from it in the same
+    order as grow_map, so each map is exactly the one grow_map builds;
+    only the array work is shared, over (seeds, x, y) stacks.
+    Returns tile type and rotation arrays of shape (seeds, size, size).
+    """
+    check_size(size)
+    rngs = [np.random.default_rng(seed_state(seed)) for seed in seeds]
+    shape = (size, size)
+    n = len(rngs)
+    road = np.zeros((n,) + shape, dtype=bool)
+    mask = np.zeros((n,) + shape, dtype=np.uint8)
+    road[:, size // 2, size // 2] = True
+    count = np.ones(n, dtype=np.int64)
+    target = max(1, int(size * size * ROAD_COVERAGE))
+
+    active = np.flatnonzero(count < target)
+    while len(active):
+        part_road = road[active]
+        part_mask = mask[active]
+        part_rngs = [rngs[i] for i in active]
+        neighbours = np.array([shift(part_road, dx, dy) for dx, dy in STEPS])
+        side = best_side(draw(part_rngs, (4,) + shape, axis=1) * neighbours)
+        join = ~part_road & (side >= 0) & (draw(part_rngs, shape) < GROWTH_CHANCE)
+
+        # Maps about to overshoot the target pick the cells that join
+        room = target - count[active]
+        for j in np.flatnonzero(join.sum(axis=(1, 2)) > room):
+            joined = np.flatnonzero(join[j])
+            join[j] = False
+            join[j].flat[part_rngs[j].choice(joined, room[j], replace=False)] = True
+
+        for i in range(4):
+            link(part_mask, join & (side == i), i)
+        road[active] = part_road | join
+        mask[active] = part_mask
+        count[active] += join.sum(axis=(1, 2))
+        active = np.flatnonzero(count < target)
+
+    for i in (2, 3):
+        dx, dy = STEPS[i]
+        unlinked = road & shift(road, dx, dy) & ((mask & SIDES[i]) == 0)
+        link(mask, unlinked & (draw(rngs, shape) < LOOP_CHANCE), i)
+
+    dead = road & (np.isin(mask, SIDES)) & (draw(rngs, shape) < DEAD_END_FIX)
+    free = np.array([shift(road, dx, dy) & ((mask & bit) == 0)
+                     for (dx, dy), bit in zip(STEPS, SIDES)])
+    side = best_side(draw(rngs, (4,) + shape, axis=1) * free)
+    for i in range(4):
+        link(mask, dead & (side == i), i)
+
+    tiles = MASK_TILES[mask]
+    return tiles[..., 0], tiles[..., 1]
+
+def walk_map(seed, size):
+    """
+    Builds a size x size map by a random walk from the middle. This is the
+    original generator, kept to compare against grow_map. Its tiles are
+    picked without looking at their neighbours.
+    Returns the tile type and rotation grids.
+    """
+    seed_random(seed)
     
     # 1. Initialize grid with "Grass"/Null (5)
     # 5 is null/grass in maps.py
-    grid_size = 10
+    grid_size = size
     new_map = [[5 for _ in range(grid_size)] for _ in range(grid_size)]
     new_rot = [[0 for _ in range(grid_size)] for _ in range(grid_size)]
     
     # 2. Random Walk Algorithm to build a connected track
     # Start in the middle
-    x, y = 5, 5
+    x, y = grid_size // 2, grid_size // 2
     
     # 0=crossing, 1=straight, 2=turn, 3=split, 4=deadend, 5=null
     # To simplify, we will essentially place random valid road pieces.
     # A true coherent racing track is hard to generate perfectly with simple random walk blocks.
     # Strategy: Place a lot of road tiles (1, 2, 3, 0) randomly but connected.
     
-    max_steps = 60
+    # 60 steps on the original 10x10 grid, scaled with the area
+    max_steps = 60 * grid_size * grid_size // 100
     directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
     
     # Ensure start point is a crossing or split to allow options
@@ -56,11 +340,4 @@ def generate_map(seed):
                 new_map[current_y][current_x] = tile_type
                 new_rot[current_y][current_x] = rot
     
-    # Update the global maps data
-    maps.map_1 = new_map
-    maps.map_1_rot = new_rot
-    
-    # Ensure traffic is reset or aware of new map?
-    # Traffic spawns using road_tile() which reads maps.map_1, so it should be fine.
-    
-    print(f"Map generated with seed: {seed}")
+    return new_map, new_rot
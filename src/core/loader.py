@@ -26,37 +26,231 @@
 #Loads images.
 
 import os, sys, pygame
+import threading
+
+from src.core import sound_cache
 from pygame.locals import *
 
+#Stand-in for sounds when the mixer is unavailable.
+class NoneSound:
+    def play(self, *args): pass
+    def stop(self): pass
+    def set_volume(self, value): pass
+
+#Keeps decoded images and sounds in memory so every asset is read from
+#disk once per session. Images are keyed by (path, transparency mode).
+#Reading and decoding can happen on a Preloader thread; only the
+#conversion to the display format, which needs the display, is left for
+#the main thread.
+class AssetCache:
+    def __init__(self):
+        self.images = {}
+        self.sounds = {}
+        # path -> decoded image waiting for conversion
+        self.decoded = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def image(self, file, transparent = True):
+        key = (image_path(file), transparent)
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+        self.misses += 1
+        with self.lock:
+            raw = self.decoded.pop(key[0], None)
+        if raw is None:
+            raw = self.read_image(key[0])
+        image = self.prepare_image(raw, transparent)
+        self.images[key] = image
+        return image
+
+    #Read and decode an image file. Safe on any thread.
+    def read_image(self, fullname):
+        print("Loading " + fullname + " ..")
+        try:
+            return pygame.image.load(fullname)
+        except pygame.error as e:
+            print(f"Cannot load image: {fullname}")
+            raise SystemExit(str(e))
+
+    #Convert to the display format. Main thread only.
+    def prepare_image(self, image, transparent):
+        # Without a display (headless runs) keep the decoded pixel format
+        if pygame.display.get_surface() is None:
+            if transparent == True:
+                image.set_colorkey(image.get_at((0,0)), RLEACCEL)
+            return image
+
+        if transparent == True:
+            image = image.convert()
+            colorkey = image.get_at((0,0))
+            image.set_colorkey(colorkey, RLEACCEL)
+        else:
+            image = image.convert_alpha()
+        return image
+
+    def sound(self, file):
+        if not pygame.mixer or not pygame.mixer.get_init():
+            return NoneSound()
+
+        fullname = os.path.join('src', 'assets', 'sounds', file)
+        sound = self.sounds.get(fullname)
+        if sound is not None:
+            self.hits += 1
+            return sound
+        self.misses += 1
+        sound = self.read_sound(fullname)
+        if sound is None:
+            return NoneSound()
+        with self.lock:
+            self.sounds[fullname] = sound
+        return sound
+
+    #Decode a sound file, None if it can't be. Samples decoded in an
+    #earlier session come from the sound cache. Safe on any thread.
+    def read_sound(self, fullname):
+        raw = sound_cache.load(fullname)
+        try:
+            if raw is not None:
+                return pygame.mixer.Sound(buffer=raw)
+            sound = pygame.mixer.Sound(fullname)
+        except pygame.error as e:
+            print(f"Cannot load sound: {fullname}")
+            return None
+        sound_cache.save(fullname, sound.get_raw())
+        return sound
+
+    #Load assets ahead of time. images is a list of (file, transparent).
+    def preload(self, images = (), sounds = ()):
+        for file, transparent in images:
+            self.image(file, transparent)
+        for file in sounds:
+            self.sound(file)
+
+    #The image for file as far as it is loaded: converted, decoded or None.
+    #Safe on any thread.
+    def peek_image(self, file, transparent = True):
+        path = image_path(file)
+        with self.lock:
+            return self.images.get((path, transparent)) or self.decoded.get(path)
+
+    #Start decoding assets on a background thread, see Preloader.
+    def preload_async(self, images = (), sounds = (), tasks = ()):
+        preloader = Preloader(self, images, sounds, tasks)
+        preloader.start()
+        return preloader
+
+    #Convert every image decoded in the background. Main thread only.
+    def finish_decoded(self, images):
+        for file, transparent in images:
+            if (image_path(file), transparent) not in self.images:
+                self.image(file, transparent)
+        # decoded twice when the main thread got there first
+        with self.lock:
+            for file, transparent in images:
+                self.decoded.pop(image_path(file), None)
+
+    #Forget a single asset, or everything when no file is given.
+    def evict(self, file = None):
+        with self.lock:
+            if file is None:
+                self.images.clear()
+                self.sounds.clear()
+                self.decoded.clear()
+                return
+            for key in [key for key in self.images if os.path.basename(key[0]) == file]:
+                del self.images[key]
+            for key in [key for key in self.sounds if os.path.basename(key) == file]:
+                del self.sounds[key]
+            self.decoded.pop(image_path(file), None)
+
+    def stats(self):
+        return {"images": len(self.images), "sounds": len(self.sounds),
+                "hits": self.hits, "misses": self.misses}
+
+#Decodes images and sounds on a daemon thread while the main thread
+#keeps drawing menus, then runs tasks, callables that precompute data
+#from the decoded assets. Progress is read with progress(); finish()
+#waits for the thread and converts the images, which is quick since the
+#slow part, decoding, is already done.
+class Preloader(threading.Thread):
+    def __init__(self, cache, images = (), sounds = (), tasks = ()):
+        threading.Thread.__init__(self, name="asset-preloader", daemon=True)
+        self.cache = cache
+        self.images = list(images)
+        self.sounds = list(sounds)
+        self.tasks = list(tasks)
+        self.total = len(self.images) + len(self.sounds) + len(self.tasks)
+        self.loaded = 0
+        self.finished = False
+        self.cancelled = False
+
+    def run(self):
+        cache = self.cache
+        for file, transparent in self.images:
+            if self.cancelled:
+                return
+            path = image_path(file)
+            with cache.lock:
+                known = path in cache.decoded or (path, transparent) in cache.images
+            if not known:
+                raw = cache.read_image(path)
+                with cache.lock:
+                    cache.decoded[path] = raw
+            self.loaded += 1
+
+        mixer = pygame.mixer and pygame.mixer.get_init()
+        for file in self.sounds:
+            if self.cancelled:
+                return
+            path = os.path.join('src', 'assets', 'sounds', file)
+            if mixer and path not in cache.sounds:
+                sound = cache.read_sound(path)
+                if sound is not None:
+                    with cache.lock:
+                        cache.sounds.setdefault(path, sound)
+            self.loaded += 1
+
+        for task in self.tasks:
+            if self.cancelled:
+                return
+            task()
+            self.loaded += 1
+
+    #Share of the assets decoded, 0.0 to 1.0.
+    def progress(self):
+        return self.loaded / self.total if self.total else 1.0
+
+    @property
+    def ready(self):
+        return not self.is_alive()
+
+    #Wait for the thread, then convert the images. Main thread only.
+    def finish(self):
+        if self.finished:
+            return
+        self.join()
+        if not self.cancelled:
+            self.cache.finish_decoded(self.images)
+        self.finished = True
+
+    #Stop after the asset being decoded, e.g. before evicting the cache.
+    def cancel(self):
+        self.cancelled = True
+        self.join()
+
+def image_path(file):
+    return os.path.join('src', 'assets', 'images', file)
+
+#Shared by all entities and menus.
+assets = AssetCache()
+
 #Load an image. :)
 def load_image(file, transparent = True):
-    print("Loading " + file + " ..")
-    fullname = os.path.join('src', 'assets', 'images', file)
-    try:
-        image = pygame.image.load(fullname)
-    except pygame.error as e:
-        print(f"Cannot load image: {fullname}")
-        raise SystemExit(str(e))
-
-    if transparent == True:
-        image = image.convert()
-        colorkey = image.get_at((0,0))
-        image.set_colorkey(colorkey, RLEACCEL)
-    else:
-        image = image.convert_alpha()
-    return image
+    return assets.image(file, transparent)
 
 def load_sound(file):
-    class NoneSound:
-        def play(self): pass
-
-    if not pygame.mixer or not pygame.mixer.get_init():
-        return NoneSound()
-
-    fullname = os.path.join('src', 'assets', 'sounds', file)
-    try:
-        sound = pygame.mixer.Sound(fullname)
-    except pygame.error as e:
-        print(f"Cannot load sound: {fullname}")
-        return NoneSound()
-    return sound
+    return assets.sound(file)
@@ -0,0 +1,143 @@
+
+"""
+Quality metrics for stacks of generated maps.
+Maps come in as (maps, x, y) tile type and rotation arrays, such as
+generator.grow_maps returns, and every metric is computed for the whole
+stack at once. Two cells are connected when both have a socket on the
+side they share, which is how traffic and the player can drive between
+them.
+
+Metrics, one value per map:
+    coverage        road cells over all cells
+    components      separate road networks
+    dead_end_ratio  road cells with a single connection over road cells
+    reachable       cells reachable from the middle of the map, where
+                    the network grows from, over all cells
+    loops           independent cycles per road cell
+    score           reachable * (1 - dead_end_ratio) * (1 + loops)
+                    / components, higher is better
+
+sweep() scores ranges of integer seeds over a process pool and keeps
+only the best maps.
+"""
+
+import os
+import heapq
+import itertools
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from src.core.generator import SIDES, STEPS, OPPOSITE, shift, socket_masks, grow_maps
+from src.data import maps
+
+METRICS = ("coverage", "components", "dead_end_ratio", "reachable", "loops", "score")
+CHUNK_CELLS = 400000    # map cells generated per worker task
+
+#Links to the east and south neighbour, (maps, x, y) booleans. West and
+#north links are these shifted by one cell.
+def links(sockets):
+    east, south = 3, 2
+    result = []
+    for i in (east, south):
+        dx, dy = STEPS[i]
+        result.append(((sockets & SIDES[i]) != 0) & ((shift(sockets, dx, dy) & OPPOSITE[i]) != 0))
+    return result
+
+#Label of every cell: the lowest flat index in its component, found by
+#spreading the minimum over links and jumping labels to their label's
+#label, which halves long chains every round.
+def label_components(east, south):
+    n, w, h = east.shape
+    west = shift(east, -1, 0)
+    north = shift(south, 0, -1)
+    labels = np.broadcast_to(np.arange(w * h).reshape(w, h), (n, w, h)).copy()
+    while True:
+        low = labels.copy()
+        for linked, dx, dy in ((east, 1, 0), (west, -1, 0), (south, 0, 1), (north, 0, -1)):
+            np.minimum(low, np.where(linked, shift(labels, dx, dy), low), out=low)
+        flat = low.reshape(n, -1)
+        low = np.take_along_axis(flat, flat, axis=1).reshape(n, w, h)
+        if np.array_equal(low, labels):
+            return labels
+        labels = low
+
+#All metrics of a stack of maps, as a dict of (maps,) arrays.
+def score_maps(tiles, rots):
+    tiles = np.asarray(tiles)
+    rots = np.asarray(rots)
+    n, w, h = tiles.shape
+    cells = w * h
+    road = tiles != maps.null
+    road_count = np.maximum(road.sum(axis=(1, 2)), 1)
+
+    east, south = links(socket_masks(tiles, rots))
+    degree = (east.astype(np.int8) + south + shift(east, -1, 0) + shift(south, 0, -1))
+    edges = east.sum(axis=(1, 2)) + south.sum(axis=(1, 2))
+
+    labels = label_components(east, south)
+    own = labels == np.arange(cells).reshape(w, h)
+    components = (own & road).sum(axis=(1, 2))
+
+    middle = (w // 2) * h + h // 2
+    flat = labels.reshape(n, -1)
+    reachable = (flat == flat[:, middle:middle + 1]).sum(axis=1)
+    reachable = np.where(road.reshape(n, -1)[:, middle], reachable, 0)
+
+    result = {
+        "coverage": road.sum(axis=(1, 2)) / cells,
+        "components": components,
+        "dead_end_ratio": (road & (degree == 1)).sum(axis=(1, 2)) / road_count,
+        "reachable": reachable / cells,
+        "loops": (edges - road.sum(axis=(1, 2)) + components) / road_count,
+    }
+    result["score"] = (result["reachable"] * (1.0 - result["dead_end_ratio"])
+                       * (1.0 + result["loops"]) / np.maximum(components, 1))
+    return result
+
+#Best maps among seeds start .. start + count - 1, as (score, seed,
+#metrics) tuples, best first. Worker entry point of sweep().
+def score_range(start, count, size, top):
+    seeds = range(start, start + count)
+    result = score_maps(*grow_maps(seeds, size))
+    best = np.argsort(-result["score"], kind="stable")[:top]
+    return [(float(result["score"][i]), seeds[i],
+             dict((name, float(result[name][i])) for name in METRICS)) for i in best]
+
+#Score count seeds from start over a pool of worker processes, keeping
+#only the top best. Chunks of seeds are handed out as workers free up,
+#at most two per worker in flight, so memory stays flat however many
+#seeds there are. on_chunk(best, done) is called with the current
+#leaders, best first, and the number of seeds scored so far.
+def sweep(start, count, size, top = 100, workers = None, chunk = None, on_chunk = None):
+    workers = workers or os.cpu_count() or 1
+    chunk = chunk or max(1, CHUNK_CELLS // (size * size))
+    ranges = ((s, min(chunk, start + count - s)) for s in range(start, start + count, chunk))
+    leaders = []
+    done = 0
+
+    with ProcessPoolExecutor(workers) as pool:
+        running = {}
+        while True:
+            for first, length in itertools.islice(ranges, 2 * workers - len(running)):
+                running[pool.submit(score_range, first, length, size, top)] = length
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                # min-heap on (score, -seed): the root is the first to go
+                for score, seed, metrics in future.result():
+                    entry = (score, -seed, metrics)
+                    if len(leaders) < top:
+                        heapq.heappush(leaders, entry)
+                    elif entry[:2] > leaders[0][:2]:
+                        heapq.heapreplace(leaders, entry)
+                done += running.pop(future)
+            if on_chunk:
+                on_chunk(ranked(leaders), done)
+    return ranked(leaders)
+
+#Heap entries as (seed, metrics), best first.
+def ranked(leaders):
+    return [(-negative_seed, metrics) for score, negative_seed, metrics
+            in sorted(leaders, key=lambda entry: entry[:2], reverse=True)]
@@ -0,0 +1,110 @@
+
+"""
+On-disk cache of generated maps.
+Each map is one binary file keyed by seed, size and generator version:
+a fixed header, the seed, the type and rotation grids as uint8 and the
+spawn indexes as uint16 (x, y) pairs. Loading is a single read, the
+arrays are views into that buffer.
+"""
+
+import os
+import struct
+import hashlib
+
+import numpy as np
+
+from src.core.settings import MAP_CACHE_DIR
+
+MAGIC = b"PYRM"
+FORMAT_VERSION = 1
+TILE_TYPES = 6      # crossing, straight, turn, split, deadend, null
+# magic, format, generator version, size, seed length, cells per type, road cells
+HEADER = struct.Struct("<4sHHHH%dI" % (TILE_TYPES + 1))
+
+#Cache file for a map.
+def path_for(seed, size, version, directory = MAP_CACHE_DIR):
+    digest = hashlib.sha1(str(seed).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(directory, f"{digest}_{size}_v{version}.map")
+
+#Pack grids and indexes into the file format.
+def pack(seed, version, grid, rot, cells_by_type, road_cells):
+    grid = np.asarray(grid, dtype=np.uint8)
+    rot = np.asarray(rot, dtype=np.uint8)
+    seed_bytes = str(seed).encode("utf-8")
+    cells = [np.asarray(cells_by_type.get(t, ()), dtype=np.uint16).reshape(-1, 2)
+             for t in range(TILE_TYPES)]
+    road_cells = np.asarray(road_cells, dtype=np.uint16).reshape(-1, 2)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, version, grid.shape[0], len(seed_bytes),
+                         *[len(c) for c in cells], len(road_cells))
+    parts = [header, seed_bytes, grid.tobytes(), rot.tobytes()]
+    parts += [c.tobytes() for c in cells]
+    parts.append(road_cells.tobytes())
+    return b"".join(parts)
+
+#Unpack a file, or None if it is not the expected map.
+def unpack(data, seed, version):
+    if len(data) < HEADER.size:
+        return None
+    fields = HEADER.unpack_from(data)
+    magic, format_version, file_version, size, seed_len = fields[:5]
+    counts = fields[5:]
+    if magic != MAGIC or format_version != FORMAT_VERSION or file_version != version:
+        return None
+
+    offset = HEADER.size
+    if data[offset:offset + seed_len] != str(seed).encode("utf-8"):
+        return None
+    offset += seed_len
+
+    cells = size * size
+    expected = offset + 2 * cells + 4 * sum(counts)
+    if len(data) != expected:
+        return None
+
+    grid = np.frombuffer(data, np.uint8, cells, offset).reshape(size, size)
+    offset += cells
+    rot = np.frombuffer(data, np.uint8, cells, offset).reshape(size, size)
+    offset += cells
+
+    arrays = []
+    for count in counts:
+        arrays.append(np.frombuffer(data, np.uint16, count * 2, offset).reshape(count, 2).astype(np.intp))
+        offset += count * 4
+    cells_by_type = dict(enumerate(arrays[:TILE_TYPES]))
+    return grid, rot, cells_by_type, arrays[TILE_TYPES]
+
+#Load a cached map as (grid, rot, cells_by_type, road_cells), or None.
+def load(seed, size, version, directory = MAP_CACHE_DIR):
+    try:
+        with open(path_for(seed, size, version, directory), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    return unpack(data, seed, version)
+
+#Store a map. Written to a temporary file first so readers never see
+#half a map.
+def save(seed, version, grid, rot, cells_by_type, road_cells, directory = MAP_CACHE_DIR):
+    path = path_for(seed, len(grid), version, directory)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(pack(seed, version, grid, rot, cells_by_type, road_cells))
+        os.replace(temp, path)
+    except OSError as e:
+        print(f"Error saving map cache: {e}")
+        return False
+    return True
+
+#Delete every cached map.
+def clear(directory = MAP_CACHE_DIR):
+    if not os.path.isdir(directory):
+        return 0
+    removed = 0
+    for name in os.listdir(directory):
+        if name.endswith(".map"):
+            os.remove(os.path.join(directory, name))
+            removed += 1
+    return removed
@@ -0,0 +1,165 @@
+
+"""
+Per-phase frame timings for the main loop.
+Call begin_frame(), then mark(phase) at the end of every phase and
+end_frame() before the next frame. Time since the previous mark is added
+to the named phase, so logic phases hit several times per frame (one per
+tick) are summed. While inactive every call returns immediately.
+"""
+
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+from pygame.locals import *
+
+PHASES = ("events", "player", "traffic", "collisions", "map", "sprites", "text", "flip")
+PHASE_COLORS = [(80, 160, 255), (255, 200, 60), (255, 110, 60), (220, 60, 220),
+                (60, 200, 90), (200, 200, 200), (120, 120, 255), (140, 140, 140)]
+WINDOW = 300         # frames in the rolling statistics and graph
+HISTORY = 100000     # frames kept for export
+GRAPH_SCALE = 4      # pixels per millisecond in the graph
+REFRESH = 30         # frames between overlay text refreshes
+
+#Percentile of a list of samples, p in 0..100.
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+class FrameProfiler:
+    def __init__(self, recording = False):
+        self.recording = recording
+        self.overlay = False
+        self.active = recording
+        self.rolling = dict((phase, deque(maxlen=WINDOW)) for phase in PHASES)
+        self.history = deque(maxlen=HISTORY)
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.last = 0.0
+        self.frames = 0
+        self.font = None
+        self.text = None
+        self.graph = None
+
+    #Show or hide the on-screen overlay. Samples are taken while it is up.
+    def toggle(self):
+        self.overlay = not self.overlay
+        self.active = self.overlay or self.recording
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.last = time.perf_counter()
+
+    def begin_frame(self):
+        if not self.active:
+            return
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        if not self.active:
+            return
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        if not self.active:
+            return
+        sample = []
+        for phase in PHASES:
+            ms = self.current[phase] * 1000.0
+            self.rolling[phase].append(ms)
+            sample.append(ms)
+            self.current[phase] = 0.0
+        self.history.append(sample)
+        self.frames += 1
+        if self.overlay:
+            self.plot(sample)
+
+    #Rolling min/avg/p99 in milliseconds per phase.
+    def stats(self):
+        result = {}
+        for phase in PHASES:
+            samples = list(self.rolling[phase])
+            result[phase] = {
+                "min": min(samples) if samples else 0.0,
+                "avg": sum(samples) / len(samples) if samples else 0.0,
+                "p99": percentile(samples, 99),
+            }
+        return result
+
+    #Scroll the graph one column and stack this frame's phases on it.
+    def plot(self, sample):
+        if self.graph is None:
+            self.graph = pygame.Surface((WINDOW, 100))
+            self.graph.fill((0, 0, 0))
+        graph = self.graph
+        height = graph.get_height()
+        graph.scroll(-1, 0)
+        graph.fill((0, 0, 0), (WINDOW - 1, 0, 1, height))
+        y = height
+        for ms, color in zip(sample, PHASE_COLORS):
+            bar = int(ms * GRAPH_SCALE)
+            if bar > 0:
+                graph.fill(color, (WINDOW - 1, max(0, y - bar), 1, bar))
+                y -= bar
+        # 60 fps budget line
+        graph.set_at((WINDOW - 1, max(0, height - int(1000.0 / 60 * GRAPH_SCALE))), (255, 0, 0))
+
+    def draw(self, screen):
+        if not self.overlay:
+            return
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        if self.text is None or self.frames % REFRESH == 0:
+            lines = [f"{'phase':<11}{'min':>7}{'avg':>7}{'p99':>7}"]
+            for phase, values in self.stats().items():
+                lines.append(f"{phase:<11}{values['min']:>7.2f}{values['avg']:>7.2f}{values['p99']:>7.2f}")
+            rendered = [self.font.render(line, True, color)
+                        for line, color in zip(lines, [(255, 255, 255)] + PHASE_COLORS)]
+            self.text = pygame.Surface((max(r.get_width() for r in rendered) + 10,
+                                        len(rendered) * 16 + 10), SRCALPHA)
+            self.text.fill((0, 0, 0, 160))
+            for i, line in enumerate(rendered):
+                self.text.blit(line, (5, 5 + i * 16))
+
+        x = screen.get_width() - WINDOW - 10
+        screen.blit(self.text, (x - self.text.get_width() - 10, 10))
+        if self.graph is not None:
+            screen.blit(self.graph, (x, 10))
+
+    #Write the per-frame samples to <base>.csv and a summary to <base>.json.
+    def export(self, base):
+        with open(base + ".csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + list(PHASES) + ["total"])
+            for frame, sample in enumerate(self.history):
+                writer.writerow([frame] + [f"{ms:.4f}" for ms in sample] + [f"{sum(sample):.4f}"])
+
+        summary = {"frames": len(self.history), "phases": {}}
+        for i, phase in enumerate(PHASES):
+            samples = [sample[i] for sample in self.history]
+            summary["phases"][phase] = {
+                "min": min(samples),
+                "avg": sum(samples) / len(samples),
+                "p99": percentile(samples, 99),
+                "max": max(samples),
+            }
+        summary["samples"] = [dict(zip(PHASES, sample)) for sample in self.history]
+        with open(base + ".json", "w") as f:
+            json.dump(summary, f)
+
+    #Export everything recorded this session, if anything was.
+    def export_session(self):
+        if not self.history:
+            return None
+        base = time.strftime("profile_%Y%m%d_%H%M%S")
+        try:
+            self.export(base)
+        except Exception as e:
+            print(f"Error saving profile: {e}")
+            return None
+        print(f"Frame profile saved to {base}.csv / {base}.json")
+        return base
@@ -0,0 +1,160 @@
+
+"""
+Recording and playback of single rounds.
+A replay holds everything a round depends on: the map seed and size, the
+generator version, the view size, the traffic count, the state of every
+random stream at the start of the round and one input bitmask per tick.
+Playing it back on a fresh Simulation repeats the round bit for bit, so
+the final stats stored with the recording double as a check.
+
+File layout: magic, header length (uint32), JSON header, zlib-compressed
+input bytes.
+"""
+
+import os
+import json
+import time
+import zlib
+import struct
+
+import pygame
+
+from src.core import generator
+from src.core.simulation import Simulation
+
+MAGIC = b"PYRP"
+FORMAT_VERSION = 1
+LENGTH = struct.Struct("<I")
+
+class ReplayError(Exception):
+    pass
+
+#What a round ended with, compared after playback.
+def fingerprint(sim):
+    result = sim.stats()
+    result["car"] = [float(sim.car.x), float(sim.car.y), float(sim.car.speed), float(sim.car.dir)]
+    result["flag"] = [sim.target.x, sim.target.y]
+    return result
+
+class Replay:
+    def __init__(self, header, inputs):
+        self.header = header
+        self.inputs = inputs
+
+    @property
+    def ticks(self):
+        return len(self.inputs)
+
+    #Header and inputs for the round sim has just been reset for.
+    @classmethod
+    def start(cls, sim, seed, map_size):
+        header = {
+            "format": FORMAT_VERSION,
+            "seed": str(seed),
+            "map_size": map_size,
+            "generator_version": generator.GENERATOR_VERSION,
+            "view_size": list(sim.view_size),
+            "traffic_count": sim.traffic_count,
+            "rng_state": sim.rng_state,
+        }
+        return cls(header, bytearray())
+
+    def record(self, inputs):
+        self.inputs.append(inputs)
+
+    def to_bytes(self):
+        header = json.dumps(self.header, separators=(",", ":")).encode("utf-8")
+        return MAGIC + LENGTH.pack(len(header)) + header + zlib.compress(bytes(self.inputs), 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC or len(data) < 4 + LENGTH.size:
+            raise ReplayError("not a replay file")
+        size, = LENGTH.unpack_from(data, 4)
+        offset = 4 + LENGTH.size
+        try:
+            header = json.loads(data[offset:offset + size].decode("utf-8"))
+            inputs = bytearray(zlib.decompress(data[offset + size:]))
+        except (ValueError, zlib.error) as e:
+            raise ReplayError(f"damaged replay file: {e}")
+        if header.get("format") != FORMAT_VERSION:
+            raise ReplayError(f"unsupported replay format {header.get('format')}")
+        return cls(header, inputs)
+
+    #Store with the result of the round, sim being where it ended.
+    def save(self, path, sim):
+        self.header["ticks"] = self.ticks
+        self.header["result"] = fingerprint(sim)
+        try:
+            with open(path, "wb") as f:
+                f.write(self.to_bytes())
+        except OSError as e:
+            print(f"Error saving replay: {e}")
+            return False
+        return True
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    #Generate the recorded map and a Simulation ready for tick 0.
+    #Maps from another generator version would not match the recording.
+    def prepare(self, score_manager = None, text_manager = None, profiler = None):
+        header = self.header
+        if header["generator_version"] != generator.GENERATOR_VERSION:
+            raise ReplayError(f"recorded with generator version {header['generator_version']}, "
+                              f"this build has {generator.GENERATOR_VERSION}")
+        generator.generate_map(header["seed"], header["map_size"])
+        sim = Simulation(tuple(header["view_size"]), score_manager, text_manager,
+                         traffic_count=header["traffic_count"], profiler=profiler)
+        sim.reset(header["rng_state"])
+        return sim
+
+    #Whether sim ended the way the recording did. True when the file has
+    #no stored result to compare with.
+    def matches(self, sim):
+        expected = self.header.get("result")
+        return expected is None or expected == fingerprint(sim)
+
+#Driver that feeds the recorded inputs back, one per tick.
+class ReplayDriver:
+    def __init__(self, replay):
+        self.inputs = replay.inputs
+        self.index = 0
+
+    @property
+    def finished(self):
+        return self.index >= len(self.inputs)
+
+    def __call__(self, sim):
+        if self.finished:
+            return 0
+        inputs = self.inputs[self.index]
+        self.index += 1
+        return inputs
+
+#Default file name for a new recording.
+def replay_path(directory = "."):
+    return os.path.join(directory, time.strftime("replay_%Y%m%d_%H%M%S.rpl"))
+
+#Play a replay file without a window, as fast as the CPU allows.
+def play_headless(path):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+
+    replay = Replay.load(path)
+    sim = replay.prepare()
+    driver = ReplayDriver(replay)
+
+    start = time.perf_counter()
+    while not driver.finished:
+        sim.step(driver(sim))
+    elapsed = time.perf_counter() - start
+
+    stats = sim.stats()
+    stats["seconds"] = elapsed
+    stats["ticks_per_second"] = stats["ticks"] / elapsed if elapsed > 0 else 0.0
+    stats["match"] = replay.matches(sim)
+    return stats
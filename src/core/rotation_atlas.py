@@ -0,0 +1,56 @@
+
+import pygame
+from src.core.settings import ROTATION_STEP
+
+#Lazily built atlas of rotated sprite frames.
+#Frames are keyed by (image, quantized angle), so every sprite sharing
+#an image also shares its rotations and nothing is allocated once a
+#heading has been seen. Collision masks of the frames are cached under
+#the same keys.
+class RotationAtlas:
+    def __init__(self, step = ROTATION_STEP):
+        self.step = step
+        self.frames = {}
+        self.masks = {}
+
+    #Number of distinct headings per image.
+    def steps(self):
+        return int(round(360 / self.step))
+
+    #Map an angle in degrees onto its frame index.
+    def quantize(self, angle):
+        return int(round(angle / self.step)) % self.steps()
+
+    #Rotated copy of image, built on first use.
+    def rotate(self, image, angle):
+        key = (image, self.quantize(angle))
+        frame = self.frames.get(key)
+        if frame is None:
+            frame = pygame.transform.rotate(image, key[1] * self.step)
+            self.frames[key] = frame
+        return frame
+
+    #Collision mask of the rotated frame, built on first use.
+    def mask(self, image, angle):
+        key = (image, self.quantize(angle))
+        mask = self.masks.get(key)
+        if mask is None:
+            mask = pygame.mask.from_surface(self.rotate(image, angle))
+            self.masks[key] = mask
+        return mask
+
+    #Rotate image around the center of rect.
+    #The rect is resized in place so sprites keep their own rect object.
+    def rot_center(self, image, rect, angle):
+        frame = self.rotate(image, angle)
+        center = rect.center
+        rect.size = frame.get_size()
+        rect.center = center
+        return frame
+
+    def clear(self):
+        self.frames.clear()
+        self.masks.clear()
+
+#Shared by the player, traffic and pointer sprites.
+atlas = RotationAtlas()
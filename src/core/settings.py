@@ -9,6 +9,26 @@ TRAFFIC_COUNT = 45
 # Map settings
 HALF_TILE = 500
 FULL_TILE = 1000
+MAP_SIZE = 10                   # cells per side of generated maps, 3 to 256
+MIN_MAP_SIZE = 3                # smaller maps leave the center cell without a road
+MAP_CACHE_DIR = "map_cache"     # generated maps are kept here, safe to delete
+SOUND_CACHE_DIR = "sound_cache" # decoded sounds are kept here, safe to delete
+GRASS_GREEN = 75                # tile pixels greener than this are grass
+CHUNK_BUDGET = 64 * 1024 * 1024 # bytes of baked background chunks to keep
+
+if MAP_SIZE < MIN_MAP_SIZE:
+    raise ValueError(f"MAP_SIZE must be at least {MIN_MAP_SIZE}, got {MAP_SIZE}")
+
+# Sprite rotation, in degrees per cached frame
+ROTATION_STEP = 2
+
+# Sound
+SOUND_CHANNELS = 16     # mixer channels shared by all sounds
+
+# Simulation timing
+TICK_RATE = 60          # logic ticks per second, gameplay is tuned to this
+MAX_FPS = 144           # render rate cap, 0 for uncapped
+MAX_FRAME_TIME = 0.25   # seconds of lag caught up on after a long frame
 
 # Gameplay settings
 PENALTY_COOL = 180
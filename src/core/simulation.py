@@ -0,0 +1,224 @@
+
+"""
+Game logic for one round, without any drawing.
+The windowed game and the headless runner both drive a Simulation one
+tick at a time with a bitmask of the pressed controls.
+"""
+
+import os
+import time
+import random
+
+import numpy as np
+import pygame
+from pygame.locals import *
+
+from src.core import camera, generator
+from src.core.profiler import FrameProfiler
+from src.core.rotation_atlas import atlas
+from src.core.settings import TRAFFIC_COUNT, MAP_SIZE, GRASS_GREEN
+from src.core.spatial_hash import SpatialHash
+from src.core.surface_map import SurfaceMap
+from src.entities import player, traffic
+from src.managers import game_manager as gamemode
+from src.ui import bounds_alert
+
+# Input bitmask, one bit per control
+INPUT_UP    = 1
+INPUT_DOWN  = 2
+INPUT_LEFT  = 4
+INPUT_RIGHT = 8
+
+#Pack the pressed arrow keys into an input bitmask.
+def keys_to_input(keys):
+    inputs = 0
+    if keys[K_UP]: inputs |= INPUT_UP
+    if keys[K_DOWN]: inputs |= INPUT_DOWN
+    if keys[K_LEFT]: inputs |= INPUT_LEFT
+    if keys[K_RIGHT]: inputs |= INPUT_RIGHT
+    return inputs
+
+#Fresh generator states for every random stream of a round, drawn from
+#the global random module. Plain lists and dicts so they survive JSON.
+def new_rng_state():
+    base = random.getrandbits(64)
+    def stream(offset):
+        version, internal, gauss = random.Random(base + offset).getstate()
+        return [version, list(internal), gauss]
+    return {"spawn": stream(0), "flags": stream(1),
+            "traffic": np.random.default_rng(base).bit_generator.state}
+
+#Generators restored from new_rng_state() output.
+def make_rngs(state):
+    rngs = {}
+    for name in ("spawn", "flags"):
+        version, internal, gauss = state[name]
+        rngs[name] = random.Random()
+        rngs[name].setstate((version, tuple(internal), gauss))
+    rngs["traffic"] = np.random.default_rng()
+    rngs["traffic"].bit_generator.state = state["traffic"]
+    return rngs
+
+#Score manager that never touches the high score file.
+class NullScoreManager:
+    def save_high_score(self, score):
+        return False
+
+    def get_high_score(self):
+        return 0
+
+class Simulation:
+    def __init__(self, view_size, score_manager = None, text_manager = None,
+                 traffic_count = TRAFFIC_COUNT, profiler = None):
+        self.view_size = view_size
+        self.profiler = profiler or FrameProfiler()
+        self.text_manager = text_manager
+        self.traffic_count = traffic_count
+        # Skid mark layer, set by the view. Headless runs leave it None.
+        self.tracks = None
+
+        self.car = player.Player(view_size)
+        self.surface = SurfaceMap()
+        self.cam = camera.Camera()
+        self.target = gamemode.Finish(score_manager or NullScoreManager(), text_manager)
+        traffic.initialize()
+        self.reset()
+
+    #Start a new round on the current map. Every random choice of the
+    #round comes from rng_state, a fresh one unless given; the state used
+    #is kept in self.rng_state so the round can be replayed.
+    def reset(self, rng_state = None):
+        self.rng_state = rng_state if rng_state is not None else new_rng_state()
+        rngs = make_rngs(self.rng_state)
+        self.car.rng = rngs["spawn"]
+        self.target.rng = rngs["flags"]
+
+        self.car.reset()
+        self.target.reset()
+        if self.text_manager:
+            self.text_manager.clear()
+        if self.tracks is not None:
+            self.tracks.clear()
+
+        self.world = SpatialHash()
+        self.traffic = traffic.TrafficSystem(self.traffic_count, rngs["traffic"], spatial=self.world)
+
+        self.cam.set_pos(self.car.x, self.car.y)
+        self.prev_cam = (self.cam.x, self.cam.y)
+        self.ticks = 0
+        self.flags = 0
+        self.crashes = 0
+        self.offroad_ticks = 0
+        self.out_of_bounds = False
+        self.crashed = False
+
+    @property
+    def game_over(self):
+        return self.target.timeleft == 0
+
+    #Advance the round by one tick.
+    def step(self, inputs):
+        car = self.car
+        target = self.target
+        profiler = self.profiler
+
+        # Input
+        if inputs & INPUT_UP: car.accelerate()
+        else: car.deaccelerate()
+        if inputs & INPUT_DOWN: car.impact()
+        if inputs & INPUT_LEFT: car.steerleft()
+        if inputs & INPUT_RIGHT: car.steerright()
+
+        # Camera
+        self.prev_cam = (self.cam.x, self.cam.y)
+        self.cam.set_pos(car.x, car.y)
+        cam = self.cam
+
+        # Offroad check, on the surface under the middle of the car
+        green = self.surface.green_at(car.x + car.rect.centerx, car.y + car.rect.centery)
+        if green > GRASS_GREEN:
+            car.grass(green)
+            self.offroad_ticks += 1
+
+        # Boundaries, checked at the car's world position
+        self.out_of_bounds = bounds_alert.breaking(car.x + car.center_x, car.y + car.center_y)
+        if self.out_of_bounds:
+            car.impact()
+
+        # Skid marks, before the update clears the flag
+        if self.tracks is not None:
+            if car.tracks:
+                self.tracks.stamp(car.x + car.rect.centerx, car.y + car.rect.centery, car.dir)
+            self.tracks.tick()
+
+        # Updates
+        car.update(cam.x, cam.y)
+        target.update(cam.x, cam.y)
+        if self.text_manager:
+            self.text_manager.update(cam.x, cam.y)
+        profiler.mark("player")
+
+        self.traffic.step()
+        profiler.mark("traffic")
+
+        # Collisions, in world space through the spatial hash
+        car_rect = car.rect.move(cam.x, cam.y)
+        target_rect = pygame.Rect(target.x, target.y, target.rect.width, target.rect.height)
+        self.world.move(target, target_rect)
+
+        if target in self.world.near(car_rect) and car_rect.colliderect(target_rect):
+            target.claim_flag()
+            self.flags += 1
+
+        car_mask = atlas.mask(car.image_orig, car.dir)
+        crashed = bool(self.traffic.collide(car_rect, car_mask))
+        if crashed:
+            car.crash()
+            target.car_crash()
+            if not self.crashed:
+                self.crashes += 1
+        self.crashed = crashed
+        profiler.mark("collisions")
+
+        self.ticks += 1
+
+    #Camera position blended between the last two ticks, for rendering.
+    def view(self, alpha):
+        prev_x, prev_y = self.prev_cam
+        return (prev_x + (self.cam.x - prev_x) * alpha,
+                prev_y + (self.cam.y - prev_y) * alpha)
+
+    def stats(self):
+        return {"ticks": self.ticks, "score": self.target.score, "flags": self.flags,
+                "crashes": self.crashes, "offroad_ticks": self.offroad_ticks}
+
+#Run rounds on seed as fast as the CPU allows, with no window.
+#driver is called with the simulation every tick and returns the input
+#bitmask. A new round starts on the same map whenever time runs out.
+def run_headless(seed, ticks, driver, traffic_count = TRAFFIC_COUNT, view_size = (1280, 720),
+                 map_size = MAP_SIZE):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+
+    generator.generate_map(seed, map_size)
+    sim = Simulation(view_size, traffic_count=traffic_count)
+
+    totals = {"ticks": 0, "score": 0, "flags": 0, "crashes": 0, "offroad_ticks": 0}
+    rounds = 1
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.step(driver(sim))
+        if sim.game_over:
+            for key, value in sim.stats().items():
+                totals[key] += value
+            rounds += 1
+            sim.reset()
+    elapsed = time.perf_counter() - start
+
+    for key, value in sim.stats().items():
+        totals[key] += value
+    totals["rounds"] = rounds
+    totals["seconds"] = elapsed
+    totals["ticks_per_second"] = totals["ticks"] / elapsed if elapsed > 0 else 0.0
+    return totals
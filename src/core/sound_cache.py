@@ -0,0 +1,88 @@
+
+"""
+On-disk cache of decoded sounds.
+Decoding an mp3 costs far more than reading its samples back, so the
+first decode of each sound is stored as raw PCM in the mixer's format.
+A file is keyed by the source path, its size and modification time and
+the mixer format (frequency, sample format, channels), so an edited mp3
+or a different mixer setup never picks up stale samples.
+"""
+
+import os
+import struct
+import hashlib
+import threading
+
+import pygame
+
+from src.core.settings import SOUND_CACHE_DIR
+
+MAGIC = b"PYRS"
+FORMAT_VERSION = 1
+# magic, format, frequency, sample format, channels, sample bytes
+HEADER = struct.Struct("<4sHIhHI")
+
+#Cache file for a sound file in the current mixer format, None if the
+#source or the mixer is missing.
+def path_for(source, directory = SOUND_CACHE_DIR):
+    mixer = pygame.mixer.get_init()
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return None
+    if not mixer:
+        return None
+    key = f"{os.path.abspath(source)}|{stat.st_size}|{stat.st_mtime_ns}|{mixer}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(directory, f"{name}_{digest}.pcm")
+
+#Samples of source decoded earlier, or None.
+def load(source, directory = SOUND_CACHE_DIR):
+    path = path_for(source, directory)
+    if path is None:
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < HEADER.size:
+        return None
+    magic, version, frequency, sample_format, channels, length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION or \
+            (frequency, sample_format, channels) != pygame.mixer.get_init() or \
+            len(data) != HEADER.size + length:
+        return None
+    return data[HEADER.size:]
+
+#Store the decoded samples of source. Written to a temporary file first
+#so readers never see half a sound.
+def save(source, raw, directory = SOUND_CACHE_DIR):
+    path = path_for(source, directory)
+    if path is None:
+        return False
+    frequency, sample_format, channels = pygame.mixer.get_init()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # the preloader thread may save the same sound as the main thread
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, frequency, sample_format, channels, len(raw)))
+            f.write(raw)
+        os.replace(temp, path)
+    except OSError as e:
+        print(f"Error saving sound cache: {e}")
+        return False
+    return True
+
+#Delete every cached sound.
+def clear(directory = SOUND_CACHE_DIR):
+    if not os.path.isdir(directory):
+        return 0
+    removed = 0
+    for name in os.listdir(directory):
+        if name.endswith(".pcm"):
+            os.remove(os.path.join(directory, name))
+            removed += 1
+    return removed
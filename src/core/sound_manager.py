@@ -0,0 +1,137 @@
+
+"""
+One place that decides which sounds actually reach the mixer.
+Game code asks for a sound every time something happens, often every
+tick while it lasts (driving on grass, leaning on the map border). Each
+sound has a rule: the minimum time between two starts, how many copies
+may play at once and a priority. When every channel is busy, a new
+sound takes over the channel of the lowest priority sound below its
+own, or is dropped. All channels follow one global volume.
+"""
+
+import pygame
+
+from src.core.loader import assets
+from src.core.settings import SOUND_CHANNELS
+
+class SoundRule:
+    def __init__(self, cooldown = 0, max_instances = 2, priority = 1, volume = 1.0):
+        self.cooldown = cooldown            # ms between two starts
+        self.max_instances = max_instances  # copies playing at once
+        self.priority = priority            # higher takes channels from lower
+        self.volume = volume                # relative to the global volume
+
+SOUND_RULES = {
+    'engine.mp3':    SoundRule(0, 1, 4, 0.3),
+    'start.mp3':     SoundRule(0, 1, 3),
+    'game_over.mp3': SoundRule(0, 1, 3),
+    'score.mp3':     SoundRule(100, 2, 3),
+    'crash.mp3':     SoundRule(400, 1, 2),
+    'bump.mp3':      SoundRule(500, 1, 1),
+    'offroad.mp3':   SoundRule(300, 1, 1),
+}
+DEFAULT_RULE = SoundRule()
+
+class SoundManager:
+    def __init__(self, cache = assets, clock = pygame.time.get_ticks):
+        self.cache = cache
+        self.clock = clock
+        self.volume = 1.0
+        self.last_start = {}
+        # channel index -> (file, priority, start time) of what it plays
+        self.owners = {}
+        self.played = 0
+        self.skipped = 0
+        self.stolen = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self):
+        return bool(pygame.mixer and pygame.mixer.get_init())
+
+    #Set up the mixer channels and the global volume.
+    def init(self, volume = None, channels = SOUND_CHANNELS):
+        if self.enabled:
+            pygame.mixer.set_num_channels(channels)
+        if volume is not None:
+            self.set_volume(volume)
+
+    #Global volume, 0.0 to 1.0. Applies to sounds already playing too.
+    def set_volume(self, volume):
+        self.volume = min(1.0, max(0.0, volume))
+        if not self.enabled:
+            return
+        for index, (file, priority, started) in self.owners.items():
+            rule = SOUND_RULES.get(file, DEFAULT_RULE)
+            pygame.mixer.Channel(index).set_volume(self.volume * rule.volume)
+
+    #Start file unless its rule says otherwise. Returns the channel, or
+    #None when the sound was held back.
+    def play(self, file, loops = 0):
+        if not self.enabled:
+            return None
+        # Cheapest check first, most requests stop here
+        rule = SOUND_RULES.get(file, DEFAULT_RULE)
+        now = self.clock()
+        last = self.last_start.get(file)
+        if last is not None and now - last < rule.cooldown:
+            self.skipped += 1
+            return None
+        sound = self.cache.sound(file)
+        if not isinstance(sound, pygame.mixer.Sound):
+            return None
+
+        free = None
+        instances = 0
+        victim = None
+        for index in range(pygame.mixer.get_num_channels()):
+            channel = pygame.mixer.Channel(index)
+            owner = self.owners.get(index)
+            if not channel.get_busy():
+                if free is None:
+                    free = index
+                continue
+            if owner is None:
+                continue
+            if owner[0] == file:
+                instances += 1
+            # lowest priority first, the oldest of those
+            if owner[1] < rule.priority and (victim is None or
+                                             owner[1:] < self.owners[victim][1:]):
+                victim = index
+        if instances >= rule.max_instances:
+            self.skipped += 1
+            return None
+
+        index = free
+        if index is None:
+            if victim is None:
+                self.dropped += 1
+                return None
+            pygame.mixer.Channel(victim).stop()
+            index = victim
+            self.stolen += 1
+
+        channel = pygame.mixer.Channel(index)
+        channel.play(sound, loops)
+        channel.set_volume(self.volume * rule.volume)
+        self.owners[index] = (file, rule.priority, now)
+        self.last_start[file] = now
+        self.played += 1
+        return channel
+
+    #Stop every copy of file.
+    def stop(self, file):
+        if not self.enabled:
+            return
+        for index, owner in list(self.owners.items()):
+            if owner[0] == file:
+                pygame.mixer.Channel(index).stop()
+                del self.owners[index]
+
+    def stats(self):
+        return {"played": self.played, "skipped": self.skipped,
+                "stolen": self.stolen, "dropped": self.dropped}
+
+#Shared by everything that makes a noise.
+sounds = SoundManager()
@@ -0,0 +1,87 @@
+
+from collections import defaultdict
+
+from src.core.settings import HALF_TILE
+
+#Uniform grid over world space for broad-phase collision queries.
+#Each key is filed under every cell its rect touches. Moving a key only
+#touches the hash when it crosses into a different set of cells.
+class SpatialHash:
+    def __init__(self, cell_size = HALF_TILE):
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)
+        self.bounds = {}
+
+    #Cell range (first_x, first_y, last_x, last_y) covered by rect.
+    def cell_bounds(self, rect):
+        size = self.cell_size
+        return (int(rect[0] // size), int(rect[1] // size),
+                int((rect[0] + rect[2]) // size), int((rect[1] + rect[3]) // size))
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def __contains__(self, key):
+        return key in self.bounds
+
+    def insert(self, key, rect):
+        self.set_cells(key, self.cell_bounds(rect))
+
+    def move(self, key, rect):
+        self.set_cells(key, self.cell_bounds(rect))
+
+    #File key under the given cell range, dropping it from its old cells.
+    def set_cells(self, key, bounds):
+        old = self.bounds.get(key)
+        if old == bounds:
+            return
+        if old is not None:
+            self.unlink(key, old)
+        self.bounds[key] = bounds
+        cells = self.cells
+        for cx in range(bounds[0], bounds[2] + 1):
+            for cy in range(bounds[1], bounds[3] + 1):
+                cells[(cx, cy)].add(key)
+
+    def remove(self, key):
+        old = self.bounds.pop(key, None)
+        if old is not None:
+            self.unlink(key, old)
+
+    def unlink(self, key, bounds):
+        cells = self.cells
+        for cx in range(bounds[0], bounds[2] + 1):
+            for cy in range(bounds[1], bounds[3] + 1):
+                bucket = cells[(cx, cy)]
+                bucket.discard(key)
+                if not bucket:
+                    del cells[(cx, cy)]
+
+    def clear(self):
+        self.cells.clear()
+        self.bounds.clear()
+
+    #Keys sharing a cell with rect. Callers do the exact overlap test.
+    def near(self, rect):
+        bounds = self.cell_bounds(rect)
+        found = set()
+        cells = self.cells
+        for cx in range(bounds[0], bounds[2] + 1):
+            for cy in range(bounds[1], bounds[3] + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found |= bucket
+        return found
+
+    #All unordered pairs of keys sharing at least one cell.
+    def pairs(self):
+        found = set()
+        for bucket in self.cells.values():
+            if len(bucket) < 2:
+                continue
+            keys = list(bucket)
+            for i in range(len(keys)):
+                for j in range(i + 1, len(keys)):
+                    a, b = keys[i], keys[j]
+                    found.add((a, b) if hash(a) <= hash(b) else (b, a))
+        return found
@@ -0,0 +1,102 @@
+
+"""
+What lies under a world point: road or grass.
+The green channel of every tile image is averaged over SURFACE_SCALE
+pixel blocks once, for each of the four rotations. A map is then just a
+grid of indices into that stack, so a lookup is a few integer divisions
+and one array read, for a single point or for arrays of points.
+"""
+
+import numpy as np
+import pygame
+
+from src.core.loader import load_image, assets
+from src.core.settings import FULL_TILE, GRASS_GREEN
+from src.data import maps
+
+SURFACE_SCALE = 10      # pixels per mask sample
+OFF_MAP_GREEN = 255     # outside the map counts as grass
+
+# Masks of the game's own tiles by (scale, tile size), they never change
+mask_cache = {}
+
+#Block-averaged green of every tile type at every rotation, indexed
+#[type * 4 + rot][x][y].
+def build_masks(tile_images, scale, tile_size):
+    n = tile_size // scale
+    masks = np.empty((len(tile_images) * 4, n, n), dtype=np.uint8)
+    for tile_type, image in enumerate(tile_images):
+        if image.get_size() != (tile_size, tile_size):
+            image = pygame.transform.scale(image, (tile_size, tile_size))
+        green = pygame.surfarray.array3d(image)[:, :, 1].astype(np.float32)
+        green = green.reshape(n, scale, n, scale).mean(axis=(1, 3))
+        for rot in range(4):
+            # np.rot90 turns [x][y] arrays the opposite way to pygame
+            masks[tile_type * 4 + rot] = np.rot90(green, -rot)
+    return masks
+
+#Build the masks of the game's tiles ahead of time, from images already
+#decoded by the asset preloader. Runs on the preloader thread.
+def warm_up(scale = SURFACE_SCALE, tile_size = FULL_TILE):
+    images = [assets.peek_image(tile_name, False) for tile_name in maps.map_tile]
+    if None not in images and (scale, tile_size) not in mask_cache:
+        mask_cache[(scale, tile_size)] = build_masks(images, scale, tile_size)
+
+class SurfaceMap:
+    def __init__(self, tile_images = None, scale = SURFACE_SCALE, tile_size = FULL_TILE):
+        self.scale = scale
+        self.tile_size = tile_size
+        self.samples = tile_size // scale
+        if tile_images is None:
+            key = (scale, tile_size)
+            if key not in mask_cache:
+                tile_images = [load_image(tile_name, False) for tile_name in maps.map_tile]
+                mask_cache[key] = build_masks(tile_images, scale, tile_size)
+            self.greens = mask_cache[key]
+        else:
+            self.greens = build_masks(tile_images, scale, tile_size)
+        self.revision = None
+        self.load_map()
+
+    #Point every cell of the current map at its tile's mask.
+    def load_map(self):
+        tiles = np.array(maps.map_1, dtype=np.intp)
+        rots = np.array(maps.map_1_rot, dtype=np.intp)
+        self.cells = tiles * 4 + rots % 4
+        self.revision = maps.revision
+
+    def check_map(self):
+        if self.revision != maps.revision:
+            self.load_map()
+
+    #Green under world point x, y.
+    def green_at(self, x, y):
+        self.check_map()
+        size = self.tile_size
+        cx = int(x // size)
+        cy = int(y // size)
+        if not (0 <= cx < self.cells.shape[0] and 0 <= cy < self.cells.shape[1]):
+            return OFF_MAP_GREEN
+        return int(self.greens[self.cells[cx, cy],
+                               int(x - cx * size) // self.scale,
+                               int(y - cy * size) // self.scale])
+
+    #Green under arrays of world points.
+    def greens_at(self, x, y):
+        self.check_map()
+        size = self.tile_size
+        cx = np.floor_divide(x, size).astype(np.intp)
+        cy = np.floor_divide(y, size).astype(np.intp)
+        inside = (cx >= 0) & (cx < self.cells.shape[0]) & (cy >= 0) & (cy < self.cells.shape[1])
+        result = np.full(np.shape(cx), OFF_MAP_GREEN, dtype=np.uint8)
+        cx, cy = cx[inside], cy[inside]
+        px = ((x[inside] - cx * size) // self.scale).astype(np.intp)
+        py = ((y[inside] - cy * size) // self.scale).astype(np.intp)
+        result[inside] = self.greens[self.cells[cx, cy], px, py]
+        return result
+
+    def is_grass(self, x, y):
+        return self.green_at(x, y) > GRASS_GREEN
+
+    def grass_mask(self, x, y):
+        return self.greens_at(x, y) > GRASS_GREEN
@@ -0,0 +1,59 @@
+
+from src.core.settings import FULL_TILE
+from src.data import maps
+from src.entities.map_tile import MapTile
+
+#Draws the map tiles that intersect the viewport.
+#Only the grid cells under the camera are touched each frame, so the
+#per-frame map cost stays flat no matter how large the grid grows.
+#MapTiles are created on first sight and dropped once the cache holds
+#more than TILE_CACHE of them, so memory follows the viewport rather
+#than the map area. Rotated tile images are shared through the atlas.
+TILE_CACHE = 64
+
+class TileRenderer:
+    def __init__(self, tile_images, tile_size = FULL_TILE):
+        self.tile_images = tile_images
+        self.tile_size = tile_size
+        self.tiles = {}
+        self.load_map()
+
+    #Forget the tiles of the previous map. Tiles for maps.map_1 / map_1_rot
+    #(indexed [x][y], matching the world layout) are built as they appear.
+    def load_map(self):
+        self.tiles = {}
+        self.grid_w = len(maps.map_1)
+        self.grid_h = len(maps.map_1[0]) if self.grid_w else 0
+
+    #MapTile for cell x, y, built on first use.
+    def tile(self, x, y):
+        tile = self.tiles.get((x, y))
+        if tile is None:
+            tile = MapTile(self.tile_images[maps.map_1[x][y]],
+                           x * self.tile_size, y * self.tile_size, maps.map_1_rot[x][y])
+            self.tiles[(x, y)] = tile
+        return tile
+
+    #Range of grid cells covered by a view of view_w x view_h at cam_x, cam_y.
+    def visible_cells(self, cam_x, cam_y, view_w, view_h):
+        size = self.tile_size
+        first_x = max(0, int(cam_x // size))
+        first_y = max(0, int(cam_y // size))
+        last_x = min(self.grid_w - 1, int((cam_x + view_w - 1) // size))
+        last_y = min(self.grid_h - 1, int((cam_y + view_h - 1) // size))
+        return range(first_x, last_x + 1), range(first_y, last_y + 1)
+
+    #Blit the visible tiles onto surface, offset by the camera.
+    def draw(self, surface, cam_x, cam_y):
+        view_w, view_h = surface.get_size()
+        cols, rows = self.visible_cells(cam_x, cam_y, view_w, view_h)
+        blit = surface.blit
+        for x in cols:
+            for y in rows:
+                tile = self.tile(x, y)
+                tile.update(cam_x, cam_y)
+                blit(tile.image, tile.rect)
+
+        # Keep only the tiles in this view once the cache is full
+        if len(self.tiles) > TILE_CACHE:
+            self.tiles = dict(((x, y), self.tiles[(x, y)]) for x in cols for y in rows)
@@ -15,6 +15,27 @@ split    = 3
 deadend  = 4
 null     = 5
 
+# Road connections of each tile type at rotation 0, one bit per side.
+# A rotation of r (x90 ccw) moves every bit r sides along N -> W -> S -> E.
+NORTH = 1
+WEST  = 2
+SOUTH = 4
+EAST  = 8
+sockets = [NORTH | WEST | SOUTH | EAST,   # crossing
+           NORTH | SOUTH,                 # straight
+           WEST | SOUTH,                  # turn
+           WEST | SOUTH | EAST,           # split
+           SOUTH,                         # deadend
+           0]                             # null
+
+# Bumped every time a new map is installed, so caches know to rebuild
+revision = 0
+
+# Spawn indexes of the current map, built by generator.install_map:
+# (x, y) arrays of every road cell and of the cells of each tile type
+road_cells = None
+cells_by_type = {}
+
 # Tilemap indices
 map_1 = [
           [2,1,3,1,1,3,1,1,1,4],
@@ -42,3 +63,6 @@ map_1_rot = [
           [0,0,2,1,3,0,0,2,1,3],
           [2,2,1,2,1,1,2,1,1,3]
             ]
+
+# Cells per side of the current (square) map
+size = len(map_1)
@@ -1,6 +1,7 @@
 
 import pygame
 from src.core.settings import *
+from src.core.rotation_atlas import atlas
 
 class MapTile(pygame.sprite.Sprite):
     def __init__(self, image, x, y, rot):
@@ -9,7 +10,7 @@ class MapTile(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
 
         if rot != 0:
-            self.image = pygame.transform.rotate(self.image, rot * 90)
+            self.image = atlas.rotate(self.image, rot * 90)
 
         self.x = x
         self.y = y
@@ -25,56 +25,47 @@
 #Player module, the car.
 import os, sys, pygame, math
 from pygame.locals import *
-from random import randint
-from src.data import maps
+import random
 
-from src.core.loader import load_image, load_sound
+from src.core.loader import load_image
+from src.core.sound_manager import sounds
+from src.core.rotation_atlas import atlas
+from src.core.settings import HALF_TILE, FULL_TILE, GRASS_GREEN
+from src.core import generator
 
 GRASS_SPEED = 0.715
-GRASS_GREEN = 75
 CENTER_X = -1
 CENTER_Y = -1
 
-#Rotate car.
-def rot_center(image, rect, angle):
-        """rotate an image while keeping its center"""
-        rot_image = pygame.transform.rotate(image, angle)
-        rot_rect = rot_image.get_rect(center=rect.center)
-        return rot_image,rot_rect
-
-def findspawn(center_x, center_y):
-    x = randint(0,9)
-    y = randint(0,9)
-    while(maps.map_1[y][x] == 5):
-            x = randint(0,9)
-            y = randint(0,9)
-    return x * 1000 + center_x, y * 1000 + center_y
+#Camera position that puts the car on a random road tile.
+def findspawn(center_x, center_y, rng = random):
+    x, y = generator.random_cell(rng=rng)
+    return x * FULL_TILE + HALF_TILE - center_x, y * FULL_TILE + HALF_TILE - center_y
 
 #define car as Player.
+#view_size defaults to the current display, pass it in when running
+#without one.
 class Player(pygame.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, view_size = None):
         pygame.sprite.Sprite.__init__(self)
         self.image = load_image('car_player.png')
         self.rect = self.image.get_rect()
         self.image_orig = self.image
-        self.screen = pygame.display.get_surface()
-        self.area = self.screen.get_rect()
+        if view_size is None:
+            view_size = (pygame.display.Info().current_w, pygame.display.Info().current_h)
         
-        # Sounds
-        self.snd_crash = load_sound('crash.mp3')
-        self.snd_engine = load_sound('engine.mp3')
-        self.snd_offroad = load_sound('offroad.mp3')
         # Play engine loop
-        self.snd_engine.play(-1)
-        self.snd_engine.set_volume(0.3)
-        CENTER_X =  int(pygame.display.Info().current_w /2)
-        CENTER_Y =  int(pygame.display.Info().current_h /2)
+        sounds.play('engine.mp3', -1)
+        CENTER_X =  int(view_size[0] /2)
+        CENTER_Y =  int(view_size[1] /2)
         self.center_x = CENTER_X
         self.center_y = CENTER_Y
         self.x = CENTER_X
         self.y = CENTER_Y
         self.rect.topleft = self.x, self.y
-        self.x, self.y = findspawn(self.center_x, self.center_y)
+        # Spawn points come from here, replays swap in their own generator
+        self.rng = random
+        self.x, self.y = findspawn(self.center_x, self.center_y, self.rng)
         self.dir = 0
         self.speed = 0.0
         self.maxspeed = 11.5
@@ -86,14 +77,14 @@ class Player(pygame.sprite.Sprite):
         self.tracks = False
 #Reset the car.
     def reset(self):
-        self.x =  int(pygame.display.Info().current_w /2)
-        self.y =  int(pygame.display.Info().current_h /2)
+        self.x = self.center_x
+        self.y = self.center_y
         self.speed = 0.0
         self.dir = 0
-        self.image, self.rect = rot_center(self.image_orig, self.rect, self.dir)
+        self.image = atlas.rot_center(self.image_orig, self.rect, self.dir)
         self.rect.topleft = self.x, self.y
         self.rect.topleft = self.x, self.y
-        self.x, self.y = findspawn(self.center_x, self.center_y)
+        self.x, self.y = findspawn(self.center_x, self.center_y, self.rng)
             
 #Emit tracks..
     def emit_tracks(self):
@@ -109,13 +100,18 @@ class Player(pygame.sprite.Sprite):
             if self.speed - self.deacceleration > GRASS_SPEED * 2:
                 self.speed = self.speed - self.deacceleration * 2
                 self.emit_tracks()
-                self.snd_offroad.play()
+                sounds.play('offroad.mp3')
 
 #Push back on impact
     def impact(self):
         if self.speed > 0:
             self.speed = self.minspeed
 
+#Hit another car.
+    def crash(self):
+        self.impact()
+        sounds.play('crash.mp3')
+
     def soften(self):
             if self.speed > 0:
                 self.speed -= self.softening
@@ -142,7 +138,7 @@ class Player(pygame.sprite.Sprite):
             self.dir = 0
         if (self.speed > self.maxspeed / 2):
             self.emit_tracks()
-        self.image, self.rect = rot_center(self.image_orig, self.rect, self.dir)
+        self.image = atlas.rot_center(self.image_orig, self.rect, self.dir)
 
 #Steer.
     def steerright(self):
@@ -151,7 +147,7 @@ class Player(pygame.sprite.Sprite):
             self.dir = 360
         if (self.speed > self.maxspeed / 2):
             self.emit_tracks()   
-        self.image, self.rect = rot_center(self.image_orig, self.rect, self.dir)
+        self.image = atlas.rot_center(self.image_orig, self.rect, self.dir)
 
 #fix this function 
     def update(self, last_x, last_y):
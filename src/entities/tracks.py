@@ -23,40 +23,78 @@
 #Camera module will keep track of sprite offset.
 
 #The car will emit tracks.
-import os, sys, pygame
+import os, sys, pygame, math
 from pygame.locals import *
 from src.core.loader import load_image
+from src.core.rotation_atlas import atlas
+from src.core.settings import HALF_TILE
 
 LIFETIME = 300
+FADE_INTERVAL = 10                                  # ticks between fade passes
+FADE_STEP = -(-255 * FADE_INTERVAL // LIFETIME)     # alpha removed per pass
+REAR_OFFSET = 18                                    # rear axle behind the car center
 
-#rotate tracks.
-def rot_center(image, rect, angle):
-        """rotate an image while keeping its center"""
-        rot_image = pygame.transform.rotate(image, angle)
-        rot_rect = rot_image.get_rect(center=rect.center)
-        return rot_image,rot_rect
-
-#Initialize, load the tracks image.
-def initialize():
-    global tracks_img
-    tracks_img = load_image('tracks.png', False)
-
-#Track sprite class.
-class Track(pygame.sprite.Sprite):
-    def __init__(self, car_x, car_y, angle):
-        pygame.sprite.Sprite.__init__(self)
-        self.image, self.rect = rot_center(tracks_img, tracks_img.get_rect(), angle)
-        self.lifetime = LIFETIME
-        self.screen = pygame.display.get_surface()
-        self.x = car_x  + 3 
-        self.y = car_y  + 20
-        self.rect.topleft = self.x, self.y
-
-    def update(self, cam_x, cam_y):
-        self.rect.topleft = self.x - cam_x, self.y - cam_y
-        self.lifetime = self.lifetime - 1
-
-        if (self.lifetime < 1):
-            pygame.sprite.Sprite.kill(self)
-        
+#Persistent skid marks, drawn into per-chunk decal surfaces.
+#A mark is stamped once into every chunk it overlaps and never touched
+#again, so drawing costs one blit per visible chunk however many marks
+#there are. Every FADE_INTERVAL ticks each chunk loses FADE_STEP alpha in
+#a single fill, and chunks with no mark newer than LIFETIME are dropped.
+#Blits and fills only cover the part of a chunk that holds marks.
+class TrackLayer:
+    def __init__(self, chunk_size = HALF_TILE):
+        self.chunk_size = chunk_size
+        self.image = load_image('tracks.png', False)
+        self.chunks = {}        # (cx, cy) -> [surface, tick of the last mark, marked rect]
+        self.ticks = 0
 
+    def __len__(self):
+        return len(self.chunks)
+
+    def clear(self):
+        self.chunks.clear()
+
+    #Stamp the marks of a car centered at world x, y heading dir.
+    def stamp(self, x, y, dir):
+        rad = math.radians(270 - dir)
+        x -= REAR_OFFSET * math.cos(rad)
+        y -= REAR_OFFSET * math.sin(rad)
+        frame = atlas.rotate(self.image, dir)
+        width, height = frame.get_size()
+        left = int(x - width / 2)
+        top = int(y - height / 2)
+
+        size = self.chunk_size
+        for cx in range(left // size, (left + width) // size + 1):
+            for cy in range(top // size, (top + height) // size + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None:
+                    chunk = self.chunks[(cx, cy)] = [pygame.Surface((size, size), SRCALPHA), 0, None]
+                marked = chunk[0].blit(frame, (left - cx * size, top - cy * size))
+                chunk[1] = self.ticks
+                chunk[2] = marked if chunk[2] is None else chunk[2].union(marked)
+
+    #Advance one tick, fading and dropping old chunks.
+    def tick(self):
+        self.ticks += 1
+        if self.ticks % FADE_INTERVAL:
+            return
+        for key, chunk in list(self.chunks.items()):
+            if self.ticks - chunk[1] >= LIFETIME:
+                del self.chunks[key]
+            else:
+                chunk[0].fill((0, 0, 0, FADE_STEP), chunk[2], special_flags = BLEND_RGBA_SUB)
+
+    #Blit the chunks inside the view.
+    def draw(self, surface, cam_x, cam_y):
+        if not self.chunks:
+            return
+        view_w, view_h = surface.get_size()
+        size = self.chunk_size
+        cam_x = int(cam_x)
+        cam_y = int(cam_y)
+        for cx in range(cam_x // size, (cam_x + view_w - 1) // size + 1):
+            for cy in range(cam_y // size, (cam_y + view_h - 1) // size + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is not None:
+                    marked = chunk[2]
+                    surface.blit(chunk[0], (cx * size - cam_x + marked.x, cy * size - cam_y + marked.y), marked)
@@ -25,83 +25,89 @@
 #Traffic module.
 
 import pygame, os, sys, math
+import numpy as np
 from pygame.locals import *
-from random import randint
+from random import randint, getrandbits
 from src.data import maps
 from src.core.loader import load_image
-from src.core.settings import HALF_TILE
-
-BOUND_MIN = 380
-BOUND_MAX = 620
-TURN_LOCK = 375 
-DISPLACEMENT = 65 
-CENTER_W = -1
-CENTER_H = -1
+from src.core.rotation_atlas import atlas
+from src.core.spatial_hash import SpatialHash
+from src.core import generator
+from src.core.settings import HALF_TILE, FULL_TILE
 
 cars = []
 car_files = ['traffic1.png', 'traffic2.png', 'traffic3.png',
              'traffic4.png', 'traffic5.png']
 
-#Rotate cars.
-def rot_center(image, rect, angle):
-        """rotate an image while keeping its center"""
-        rot_image = pygame.transform.rotate(image, angle)
-        rot_rect = rot_image.get_rect(center=rect.center)
-        return rot_image,rot_rect
+# Headings are side indices like the socket bits: 0 N, 1 W, 2 S, 3 E,
+# so dir == heading * 90. STANDING is a car placed on a tile at spawn.
+STANDING = 4
+STEPS = ((0, -1), (-1, 0), (0, 1), (1, 0), (0, 0))
+STEP_X = np.array([step[0] for step in STEPS])
+STEP_Y = np.array([step[1] for step in STEPS])
 
-#Initialize cars.
-def initialize(center_w, center_h):
-    global CENTER_W, CENTER_H
-    CENTER_W = center_w
-    CENTER_H = center_h
+# Set bits per socket mask, and the index of the k-th set side
+POPCOUNT = np.array([bin(mask).count("1") for mask in range(16)])
+NTH_SIDE = np.array([[([side for side in range(4) if mask >> side & 1] + [0] * 4)[k]
+                      for k in range(4)] for mask in range(16)])
+
+navigation_table = None
+navigation_revision = -1
+
+#Build the navigation table of the current map.
+#exits[x, y, heading] is the socket mask of the sides a car heading that
+#way may leave cell x, y by: every road side except the one it came in
+#through, or straight back where there is no other way. A STANDING car
+#may leave by any road side (any side at all on grass).
+def build_navigation():
+    masks = generator.socket_masks(np.array(maps.map_1), np.array(maps.map_1_rot))
+    exits = np.empty(masks.shape + (5,), dtype=np.uint8)
+    for heading in range(4):
+        back = 1 << ((heading + 2) % 4)
+        ahead = masks & (15 ^ back)
+        exits[:, :, heading] = np.where(ahead == 0, back, ahead)
+    exits[:, :, STANDING] = np.where(masks == 0, 15, masks)
+    return exits
 
-    for index in range(0, len(car_files)):
-        cars.append(load_image(car_files[index], True))
+#Navigation table of the current map, built once per map.
+def navigation():
+    global navigation_table, navigation_revision
+    if navigation_revision != maps.revision or navigation_table is None:
+        navigation_table = build_navigation()
+        navigation_revision = maps.revision
+    return navigation_table
+
+#Exit mask for a car in cell col, row, heading; back the way it came
+#off the map.
+def exits_at(col, row, heading):
+    exits = navigation()
+    if 0 <= col < exits.shape[0] and 0 <= row < exits.shape[1]:
+        return int(exits[col, row, heading])
+    return 1 << ((heading + 2) % 4) if heading != STANDING else 15
+
+#Initialize cars.
+def initialize():
+    # Replace rather than append, initialize() runs every round.
+    cars[:] = [load_image(car_file, True) for car_file in car_files]
 
 #Traffic sprite and AI controller.
 class Traffic(pygame.sprite.Sprite):
 
     def road_tile(self):
-        x = randint(0,9)
-        y = randint(0,9)
-        while (maps.map_1[x][y] != 0):
-            x = randint(0,9)
-            y = randint(0,9)
+        x, y = generator.random_cell((maps.crossing,))
         return x * 1000 + HALF_TILE, y * 1000 + HALF_TILE
 
-#Turn the vehicle!
+#Turn the vehicle! Picks one of the exits of the current tile.
     def turning(self):
-        self.turning_cooldown = TURN_LOCK
-        try:
-            tile_type = maps.map_1[int((self.y + CENTER_H) / 1000)][int((self.x + CENTER_W) / 1000)]
-            tile_rot  = maps.map_1_rot[int((self.y + CENTER_H) / 1000)][int((self.x + CENTER_W) / 1000)]
-
-#turn controller
-            if tile_type == maps.turn:
-                if (tile_rot + 2 == self.dir / 90) or (-(tile_rot + 2) == self.dir / 90):
-                    self.dir += 90
-                else:
-                    self.dir -= 90
-
-#split controller
-            if tile_type == maps.split:
-                self.dir = -180 - tile_rot * 90
-                self.dir += randint(-1, 1) * 90
-
-#crossing controller
-            if tile_type == maps.crossing:
-                self.dir += randint(1,3) * 90
-
-#dead end controller
-            if tile_type == maps.deadend:
-                self.dir -= 180 
-
-        except:
-            return
+        col = int(self.x // FULL_TILE)
+        row = int(self.y // FULL_TILE)
+        exits = exits_at(col, row, self.heading)
+        self.heading = int(NTH_SIDE[exits, randint(0, int(POPCOUNT[exits]) - 1)])
+        self.dir = self.heading * 90
 
 #Rotate the image.
     def rotate(self):
-        self.image, self.rect = rot_center(self.image_orig, self.rect, self.dir)
+        self.image = atlas.rot_center(self.image_orig, self.rect, self.dir)
 
 #Initialize the object.           
     def __init__(self):
@@ -114,29 +120,203 @@ class Traffic(pygame.sprite.Sprite):
         self.area = self.screen.get_rect()
         self.x, self.y = self.road_tile()
         self.rect.topleft = self.x, self.y
-        self.dir = 0
+        self.heading = STANDING
         self.turning()
         self.rotate()
         self.speed = randint(60, 145) / 100
-        self.turning_cooldown = 0
 
 #Update the position.
     def update(self, cam_x, cam_y):
         """update direction of traffic based on current tile"""
-        self.x = self.x + self.speed * math.cos(math.radians(270-self.dir))
-        self.y = self.y + self.speed * math.sin(math.radians(270-self.dir))
-        
-#trigger turn when vehicle is at center of tile.
-        if (self.turning_cooldown > 0):
-                self.turning_cooldown = self.turning_cooldown - 1
-        elif (randint(0, DISPLACEMENT) == 2):
-            if (self.x % 1000 > BOUND_MIN and self.x % 1000 < BOUND_MAX):
-                if (self.y % 1000 > BOUND_MIN and self.y % 1000 < BOUND_MAX):
-                        self.turning()
-                        self.rotate()   
+        step_x, step_y = STEPS[self.heading]
+        center_x = (self.x // FULL_TILE) * FULL_TILE + HALF_TILE
+        center_y = (self.y // FULL_TILE) * FULL_TILE + HALF_TILE
+        before = (self.x - center_x) * step_x + (self.y - center_y) * step_y
+        self.x = self.x + self.speed * step_x
+        self.y = self.y + self.speed * step_y
+
+#turn when vehicle passes the center of its tile.
+        after = (self.x - center_x) * step_x + (self.y - center_y) * step_y
+        if before < 0 <= after:
+            self.x, self.y = center_x, center_y
+            self.turning()
+            self.x += after * STEPS[self.heading][0]
+            self.y += after * STEPS[self.heading][1]
+            self.rotate()
 
         self.rect.topleft = self.x - cam_x, self.y - cam_y
 
 
+#Drawing-only view of one car in a TrafficSystem.
+class TrafficView(pygame.sprite.Sprite):
+    def __init__(self, image):
+        pygame.sprite.Sprite.__init__(self)
+        self.image_orig = image
+        self.image = image
+        self.rect = image.get_rect()
+        self.dir = None
+
+    def refresh(self, screen_x, screen_y, dir):
+        if dir != self.dir:
+            self.dir = dir
+            self.image = atlas.rot_center(self.image_orig, self.rect, dir)
+        self.rect.topleft = screen_x, screen_y
+
+#All traffic as a struct of NumPy arrays.
+#Every car is advanced in one vectorized step with the same rules as
+#Traffic.update/turning: cars drive along the tile center lines and pick
+#an exit from the navigation table whenever they pass a tile center.
+#Views are only synced for cars on screen, and those are the only ones
+#in self.group for drawing.
+#Cars are filed in a SpatialHash under their index; only cars that move
+#into different cells are re-filed each step.
+class TrafficSystem:
+    def __init__(self, count, rng = None, spatial = None):
+        self.rng = rng if rng is not None else np.random.default_rng(getrandbits(32))
+        self.count = count
+        self.spatial = spatial if spatial is not None else SpatialHash()
+        self.load_map()
+
+        self.x, self.y, self.heading = self.lane_spawns(count)
+        self.image_index = self.rng.integers(0, len(cars), count)
+        self.dir = self.heading * 90.0
+        self.speed = self.rng.integers(60, 146, count) / 100
+        self.prev_x = self.x.copy()
+        self.prev_y = self.y.copy()
+
+        self.views = [TrafficView(cars[index]) for index in self.image_index.tolist()]
+        self.group = pygame.sprite.Group()
+
+        # Side of a square that holds the car at any rotation
+        extents = [math.ceil(math.hypot(*car.get_size())) for car in cars]
+        self.extent = np.array(extents)[self.image_index]
+        # Cars whose top-left is this far off the view may still show
+        self.view_margin = max(extents)
+        self.cell_bounds = np.full((count, 4), np.iinfo(np.int64).min)
+        self.index_spatial()
+
+    #Navigation table of the current map, indexed [x][y][heading].
+    def load_map(self):
+        self.exits = navigation()
+
+    #Random spots on the lanes of all road cells, and their headings.
+    #Each car gets a random road side of a random road cell and is put on
+    #the lane between the cell center and that side, heading out, so the
+    #fleet spreads over the whole network instead of piling up on tile
+    #centers.
+    def lane_spawns(self, count):
+        cells = generator.spawn_cells()
+        picked = cells[self.rng.integers(0, len(cells), count)]
+        exits = self.exits[picked[:, 0], picked[:, 1], STANDING]
+        heading = NTH_SIDE[exits, (self.rng.random(count) * POPCOUNT[exits]).astype(int)]
+        offset = self.rng.random(count) * HALF_TILE
+        x = picked[:, 0] * FULL_TILE + HALF_TILE + offset * STEP_X[heading]
+        y = picked[:, 1] * FULL_TILE + HALF_TILE + offset * STEP_Y[heading]
+        return x.astype(float), y.astype(float), heading
+
+    #Vectorized Traffic.turning() for the cars in idx, which are in
+    #cells col, row: each picks one of the exits of its tile.
+    def turn(self, idx, col, row):
+        col = col.astype(int)
+        row = row.astype(int)
+        heading = self.heading[idx]
+        exits = np.where(heading == STANDING, 15, 1 << ((heading + 2) % 4))
+        inside = (col >= 0) & (col < self.exits.shape[0]) & (row >= 0) & (row < self.exits.shape[1])
+        exits[inside] = self.exits[col[inside], row[inside], heading[inside]]
+
+        pick = (self.rng.random(len(idx)) * POPCOUNT[exits]).astype(int)
+        self.heading[idx] = NTH_SIDE[exits, pick]
+        self.dir[idx] = self.heading[idx] * 90
+
+    #Advance every car by one tick.
+    def step(self):
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+        step_x = STEP_X[self.heading]
+        step_y = STEP_Y[self.heading]
+        self.x += self.speed * step_x
+        self.y += self.speed * step_y
+
+#turn when vehicle passes the center of its tile.
+        col = self.prev_x // FULL_TILE
+        row = self.prev_y // FULL_TILE
+        center_x = col * FULL_TILE + HALF_TILE
+        center_y = row * FULL_TILE + HALF_TILE
+        before = (self.prev_x - center_x) * step_x + (self.prev_y - center_y) * step_y
+        after = (self.x - center_x) * step_x + (self.y - center_y) * step_y
+        idx = np.flatnonzero((before < 0) & (after >= 0))
+        if len(idx):
+            self.turn(idx, col[idx], row[idx])
+            # continue from the center along the new heading
+            heading = self.heading[idx]
+            self.x[idx] = center_x[idx] + after[idx] * STEP_X[heading]
+            self.y[idx] = center_y[idx] + after[idx] * STEP_Y[heading]
+
+        self.index_spatial()
+
+    #Re-file the cars whose cell range changed since the last step.
+    def index_spatial(self):
+        size = self.spatial.cell_size
+        bounds = np.stack([self.x // size, self.y // size,
+                           (self.x + self.extent) // size,
+                           (self.y + self.extent) // size], axis=1).astype(np.int64)
+        changed = np.flatnonzero((bounds != self.cell_bounds).any(axis=1))
+        set_cells = self.spatial.set_cells
+        for i, cell_range in zip(changed.tolist(), bounds[changed].tolist()):
+            set_cells(i, tuple(cell_range))
+        self.cell_bounds = bounds
+
+    #World rect of car i with its current rotation.
+    def rect(self, i):
+        frame = atlas.rotate(cars[self.image_index[i]], self.dir[i])
+        return pygame.Rect(int(self.x[i]), int(self.y[i]), frame.get_width(), frame.get_height())
+
+    #Indices of the cars overlapping a world rect. With a mask (of the
+    #sprite filling rect) only cars whose pixels touch it are returned;
+    #masks are only compared after the rects overlap.
+    def collide(self, rect, mask = None):
+        hits = [key for key in self.spatial.near(rect)
+                if isinstance(key, int) and self.rect(key).colliderect(rect)]
+        if mask is None or not hits:
+            return hits
+        return [i for i in hits
+                if mask.overlap(atlas.mask(cars[self.image_index[i]], self.dir[i]),
+                                (int(self.x[i]) - rect.x, int(self.y[i]) - rect.y))]
+
+    #All pairs of cars that overlap each other.
+    def collisions(self):
+        rects = {}
+        def rect(i):
+            found = rects.get(i)
+            if found is None:
+                found = rects[i] = self.rect(i)
+            return found
+        return [(a, b) for a, b in self.spatial.pairs()
+                if isinstance(a, int) and isinstance(b, int)
+                and rect(a).colliderect(rect(b))]
+
+    #Refresh the views of the cars inside the view and regroup them.
+    #alpha blends positions between the previous and the current tick.
+    def sync(self, cam_x, cam_y, view_w, view_h, alpha = 1.0):
+        if alpha < 1.0:
+            screen_x = self.prev_x + (self.x - self.prev_x) * alpha - cam_x
+            screen_y = self.prev_y + (self.y - self.prev_y) * alpha - cam_y
+        else:
+            screen_x = self.x - cam_x
+            screen_y = self.y - cam_y
+        margin = self.view_margin
+        visible = (screen_x > -margin) & (screen_x < view_w) & \
+                  (screen_y > -margin) & (screen_y < view_h)
+        idx = np.flatnonzero(visible)
+
+        self.group.empty()
+        views = self.views
+        for i, x, y, dir in zip(idx.tolist(), screen_x[idx].tolist(),
+                                screen_y[idx].tolist(), self.dir[idx].tolist()):
+            view = views[i]
+            view.refresh(x, y, dir)
+            self.group.add(view)
 
-              
+    def update(self, cam_x, cam_y, view_w, view_h):
+        self.step()
+        self.sync(cam_x, cam_y, view_w, view_h)
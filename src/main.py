@@ -4,6 +4,7 @@
 
 import sys
 import os
+import time
 import warnings
 
 # Suppress pkg_resources deprecation warning from pygame
@@ -20,47 +21,70 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 # Import settings
-from src.core.settings import TRAFFIC_COUNT, COLOR_BG, COLOR_TEXT
+from src.core.settings import TRAFFIC_COUNT, MAP_SIZE, TICK_RATE, MAX_FPS, MAX_FRAME_TIME
 
 # Import core modules
-from src.core import camera
-from src.core.loader import load_image
+from src.core.loader import assets
+from src.core.sound_manager import sounds
+from src.core.rotation_atlas import atlas
 from src.core.config_manager import ConfigManager
 from src.core.score_manager import ScoreManager
+from src.core.simulation import Simulation, keys_to_input, run_headless
+from src.core.drivers import make_driver, driver_spec
+from src.core.profiler import FrameProfiler
+from src.core.replay import Replay, ReplayDriver, ReplayError, play_headless, replay_path
 
 # Import data
 from src.data import maps
 
-# Import entities
-from src.entities import player, traffic, tracks
-from src.entities.map_tile import MapTile
-
-# Import managers
-from src.managers import game_manager as gamemode
-
 # Import generator and menu
 from src.core import generator
 from src.ui.start_menu import StartMenu
 from src.ui.game_over_menu import GameOverMenu
 from src.ui.pause_menu import PauseMenu
 from src.ui.floating_text import TextManager
+from src.ui.game_view import GameView
+from src.entities.traffic import car_files
+from src.core import surface_map
+
+# Everything a round needs, decoded in the background while the start
+# menu is open. Images are (file, transparent) as load_image takes them.
+PRELOAD_IMAGES = ([(tile_name, False) for tile_name in maps.map_tile] +
+                  [(car_file, True) for car_file in car_files] +
+                  [('car_player.png', True), ('finish.png', False), ('bounds.png', True),
+                   ('menu.png', True), ('direction.png', False), ('tracks.png', False)])
+PRELOAD_SOUNDS = ['start.mp3', 'crash.mp3', 'engine.mp3', 'offroad.mp3', 'score.mp3', 'bump.mp3']
 
-# Import UI
-from src.ui import pointer, menu, bounds_alert, timeout_alert
+#Save the frame profile, if one was recorded, and leave.
+def quit_game(profiler):
+    profiler.export_session()
+    pygame.quit()
+    sys.exit(0)
 
-def main():
+#Store the round being recorded, if any.
+def save_replay(recording, sim):
+    if recording is not None and recording.ticks > 0:
+        path = replay_path()
+        if recording.save(path, sim):
+            print(f"Replay saved to {path}")
+
+def main(profile = False, record = False):
+    # Initialize Managers
+    config_mgr = ConfigManager()
+    score_mgr = ScoreManager()
+    
+    # F3 toggles the overlay, --profile records from the start
+    profiler = FrameProfiler(recording=profile)
+    
+    # Initialize Pygame once, cached assets stay valid across rounds
+    pygame.init()
+    pygame.mixer.init()
+    sounds.init()
+    
     while True:
-        # Initialize Managers
-        config_mgr = ConfigManager()
-        score_mgr = ScoreManager()
-        
-        # Initialize Pygame
-        pygame.init()
-        pygame.mixer.init()
-        
-        # Apply Config
+        # Apply Config (again after a resolution change)
         resolution = config_mgr.get("resolution")
-        volume = config_mgr.get("volume")
+        sounds.set_volume(config_mgr.get("volume"))
         
         screen = pygame.display.set_mode(resolution)
         pygame.display.set_caption('Race of Math')
@@ -68,192 +92,216 @@ def main():
         center_w = resolution[0] // 2
         center_h = resolution[1] // 2
         
-        # 1. Run Start Menu
-        start_menu_inst = StartMenu(screen, config_mgr, score_mgr)
-        menu_result = start_menu_inst.run()
-        
-        if menu_result is None:
-            pygame.quit()
-            sys.exit(0)
-            
-        if menu_result == "RESTART":
-            pygame.quit()
-            continue
-            
-        # Seed selected
-        seed = menu_result
-        
-        # 2. Generate Map
-        generator.generate_map(seed)
+        # Game objects are built on the first round and reset afterwards
+        sim = None
+        recording = None
 
-        # 3. Initialize Game Objects
-        text_mgr = TextManager()
-        target = gamemode.Finish(score_mgr, text_mgr) 
-        
-        clock = pygame.time.Clock()
-        running = True
-        paused = False
-        font = pygame.font.Font(None, 24)
+        # Decode the game's assets while the player looks at the menu
+        preloader = assets.preload_async(PRELOAD_IMAGES, PRELOAD_SOUNDS, [surface_map.warm_up])
         
-        car = player.Player()
-        cam = camera.Camera()
-        
-        bound_alert_inst = bounds_alert.Alert()
-        time_alert_inst = timeout_alert.Alert()
-        info = menu.Alert() 
-        
-        ptr = pointer.Tracker(int(center_w * 2), int(center_h * 2))
-
-        # create sprite groups.
-        map_s     = pygame.sprite.Group()
-        player_s  = pygame.sprite.Group()
-        traffic_s = pygame.sprite.Group()
-        tracks_s  = pygame.sprite.Group()
-        target_s  = pygame.sprite.Group()
-        pointer_s = pygame.sprite.Group()
-        
-        # generate tiles
-        loaded_map_images = []
-        for tile_name in maps.map_tile:
-            loaded_map_images.append(load_image(tile_name, False))
+        while True:
+            # 1. Run Start Menu
+            start_menu_inst = StartMenu(screen, config_mgr, score_mgr, preloader)
+            menu_result = start_menu_inst.run()
+            
+            if menu_result is None:
+                quit_game(profiler)
+                
+            if menu_result == "RESTART":
+                # Objects depend on the screen size, rebuild them all
+                preloader.cancel()
+                assets.evict()
+                atlas.clear()
+                break
 
-        for x in range (0, 10):
-            for y in range (0, 10):
-                tile_index = maps.map_1[x][y]
-                rot = maps.map_1_rot[x][y]
-                map_s.add(MapTile(loaded_map_images[tile_index], x * 1000, y * 1000, rot))
+            # Usually done already, otherwise wait for the rest
+            preloader.finish()
+                
+            # Seed selected
+            seed = menu_result
+            
+            # 2. Generate Map
+            generator.generate_map(seed)
 
-        # generate traffic
-        traffic.initialize(center_w, center_h)
-        for _ in range(0, TRAFFIC_COUNT):
-            traffic_s.add(traffic.Traffic())
+            # 3. Initialize Game Objects
+            if sim is None:
+                text_mgr = TextManager()
+                sim = Simulation(resolution, score_mgr, text_mgr, profiler=profiler)
+                car, cam, target = sim.car, sim.cam, sim.target
+                view = GameView(sim, resolution, text_mgr, profiler)
+                clock = pygame.time.Clock()
+            else:
+                # New traffic on the new map
+                sim.reset()
 
-        player_s.add(car)
-        target_s.add(target)
-        pointer_s.add(ptr)
-        
-        # Main Game Loop
-        while running:
-            # 1. Event Handling
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit(0)
-                    
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE or event.key == pygame.K_p:
-                        # Toggle Pause
-                        paused = True
-                        pause_menu = PauseMenu(screen)
-                        res = pause_menu.run()
-                        if res == "QUIT":
-                            pygame.quit()
-                            sys.exit(0)
-                        elif res == "MENU":
-                            running = False # Break inner loop, goes to start menu
-                        elif res == "RESUME":
-                            paused = False
-                            
-                    if event.key == pygame.K_m:
-                         info.appear()
-                         pygame.display.flip()
-                         # Small cheat: wait for input or just show? Original code just blitted once.
-                         # We'll just let it render this frame or handling logic.
-                         # Better logic: set a flag "show_info" and render it at the end.
-                         pass
+            # A round is recorded from its reset onwards
+            if record:
+                recording = Replay.start(sim, seed, MAP_SIZE)
 
-            if not running: break 
+            running = True
+            paused = False
             
-            # 2. Logic Updates (only if not paused, but loop blocks on pause above)
+            # Logic runs at a fixed TICK_RATE, rendering as fast as it can
+            tick_time = 1.0 / TICK_RATE
+            accumulator = 0.0
+            last_time = time.perf_counter()
             
-            # Input
-            keys = pygame.key.get_pressed()
-            if keys[K_UP]: car.accelerate()
-            else: car.deaccelerate()
-            if keys[K_DOWN]: car.impact()
-            if keys[K_LEFT]: car.steerleft()
-            if keys[K_RIGHT]: car.steerright()
-            
-            # Camera
-            cam.set_pos(car.x, car.y)
-            
-            # Offroad check (Simple)
-            try:
-                tile_x = int(car.x / 1000)
-                tile_y = int(car.y / 1000)
-                if 0 <= tile_x < 10 and 0 <= tile_y < 10:
-                    if maps.map_1[tile_y][tile_x] == 5: # Grass
-                        car.grass(100) 
-            except: pass
+            # Main Game Loop
+            while running:
+                now = time.perf_counter()
+                accumulator += min(now - last_time, MAX_FRAME_TIME)
+                last_time = now
+                profiler.begin_frame()
+                
+                # 1. Event Handling
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        save_replay(recording, sim)
+                        quit_game(profiler)
+                    
+                    if event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_ESCAPE or event.key == pygame.K_p:
+                            # Toggle Pause
+                            paused = True
+                            pause_menu = PauseMenu(screen)
+                            res = pause_menu.run()
+                            if res == "QUIT":
+                                save_replay(recording, sim)
+                                quit_game(profiler)
+                            elif res == "MENU":
+                                # Save before the next round regenerates the map
+                                save_replay(recording, sim)
+                                recording = None
+                                running = False # Break inner loop, goes to start menu
+                            elif res == "RESUME":
+                                paused = False
+                            # Don't try to catch up on the time spent paused
+                            last_time = time.perf_counter()
+                            accumulator = 0.0
+                            profiler.begin_frame()
+                        
+                        if event.key == pygame.K_F3:
+                            profiler.toggle()
 
-            # Boundaries
-            if bound_alert_inst.breaking(car.x, car.y):
-                bound_alert_inst.appear()
-                car.impact()
+                if not running: break 
+            
+                # 2. Logic Updates (only if not paused, but loop blocks on pause above)
+                keys = pygame.key.get_pressed()
+                inputs = keys_to_input(keys)
+                profiler.mark("events")
+                while accumulator >= tick_time and not sim.game_over:
+                    sim.step(inputs)
+                    if recording is not None:
+                        recording.record(inputs)
+                    accumulator -= tick_time
 
-            # Time Out Check -> Game Over
-            if target.timeleft == 0:
-                # Show Game Over
-                car.speed = 0
-                go_menu = GameOverMenu(screen, target.score, target.high_score_reached)
-                go_res = go_menu.run()
+                # Time Out Check -> Game Over
+                if sim.game_over:
+                    save_replay(recording, sim)
+                    recording = None
+                    # Show Game Over
+                    car.speed = 0
+                    go_menu = GameOverMenu(screen, target.score, target.high_score_reached)
+                    go_res = go_menu.run()
                 
-                if go_res == "QUIT":
-                    pygame.quit()
-                    sys.exit(0)
-                elif go_res == "MENU":
-                    running = False 
-                elif go_res == "RESTART":
-                    # We can either break to outer loop (reload everything) or just reset entities.
-                    # Outer loop is safer for full reset.
-                    running = False 
+                    if go_res == "QUIT":
+                        quit_game(profiler)
+                    elif go_res == "MENU":
+                        running = False 
+                    elif go_res == "RESTART":
+                        # Back to the start menu, which regenerates the map.
+                        running = False 
+                    continue
                 
-            # Updates
-            map_s.update(cam.x, cam.y)
-            player_s.update(cam.x, cam.y)
-            traffic_s.update(cam.x, cam.y)
-            tracks_s.update(cam.x, cam.y)
-            target_s.update(cam.x, cam.y)
-            pointer_s.update(car.x, car.y, target.x, target.y)
-            text_mgr.update(cam.x, cam.y)
+                # 3. Drawing, interpolated between the last two ticks
+                view.draw(screen, accumulator / tick_time, keys[K_m])
+            
+                pygame.display.flip()
+                clock.tick(MAX_FPS)
+                profiler.mark("flip")
+                profiler.end_frame()
 
-            # Collisions
-            if pygame.sprite.spritecollide(car, target_s, False):
-                target.claim_flag()
-                
-            if pygame.sprite.spritecollide(car, traffic_s, False):
-                car.impact()
-                target.car_crash()
-                # car.snd_crash.play() # handled in player
+#Watch a recorded round at the recorded view size. ESC or closing the
+#window stops early.
+def watch_replay(path):
+    pygame.init()
+    replay = Replay.load(path)
+    screen = pygame.display.set_mode(tuple(replay.header["view_size"]))
+    pygame.display.set_caption('Race of Math - replay')
 
-            # 3. Drawing
-            screen.fill(COLOR_BG)
-            
-            map_s.draw(screen)
-            tracks_s.draw(screen) # overlay tracks
-            
-            target_s.draw(screen)
-            player_s.draw(screen)
-            traffic_s.draw(screen)
-            pointer_s.draw(screen)
-            
-            # Floating Text
-            text_mgr.draw(screen, cam.x, cam.y)
-            
-            # UI Overlays
-            text_score = font.render(f'Score: {target.score}', True, COLOR_TEXT)
-            screen.blit(text_score, (20, 20))
-            
-            text_time = font.render(f'Time: {int(target.timeleft / 60)}', True, COLOR_TEXT)
-            screen.blit(text_time, (20, 50))
-            
-            # Info overlay (if M pressed this frame, or permanent toggle?)
-            # Original was instantaneous. Let's stick to key check above.
-            if keys[K_m]:
-                info.appear() # Re-blit simple info
-            
-            pygame.display.flip()
-            clock.tick(60)
+    text_mgr = TextManager()
+    sim = replay.prepare(text_manager=text_mgr)
+    view = GameView(sim, sim.view_size, text_mgr)
+    driver = ReplayDriver(replay)
+    clock = pygame.time.Clock()
+
+    tick_time = 1.0 / TICK_RATE
+    accumulator = 0.0
+    last_time = time.perf_counter()
+    while not driver.finished:
+        now = time.perf_counter()
+        accumulator += min(now - last_time, MAX_FRAME_TIME)
+        last_time = now
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                pygame.quit()
+                return
+        while accumulator >= tick_time and not driver.finished:
+            sim.step(driver(sim))
+            accumulator -= tick_time
+        view.draw(screen, accumulator / tick_time)
+        pygame.display.flip()
+        clock.tick(MAX_FPS)
+
+    print(f"Replay {'matches' if replay.matches(sim) else 'DIVERGED from'} the recording")
+    pygame.quit()
+
+#Play a recorded round without a window and check it ends the same way.
+def headless_replay(path):
+    stats = play_headless(path)
+    print(f"{stats['ticks']} ticks in {stats['seconds']:.2f}s "
+          f"({stats['ticks_per_second']:.0f} ticks/s)")
+    print(f"score {stats['score']}, flags {stats['flags']}, crashes {stats['crashes']}, "
+          f"off-road ticks {stats['offroad_ticks']}")
+    print("replay matches the recording" if stats["match"] else "REPLAY DIVERGED from the recording")
+    return 0 if stats["match"] else 1
+
+#Soak-test / benchmark the simulation without a window.
+def headless(args):
+    driver = make_driver(args.driver, args.seed)
+
+    stats = run_headless(args.seed, args.ticks, driver, traffic_count=args.traffic,
+                         map_size=args.map_size)
+    print(f"{stats['ticks']} ticks in {stats['seconds']:.2f}s "
+          f"({stats['ticks_per_second']:.0f} ticks/s), {stats['rounds']} round(s)")
+    print(f"score {stats['score']}, flags {stats['flags']}, crashes {stats['crashes']}, "
+          f"off-road ticks {stats['offroad_ticks']}")
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Race of Math")
+    parser.add_argument("--headless", action="store_true", help="run the simulation without a window")
+    parser.add_argument("--profile", action="store_true", help="record frame timings and export them on exit")
+    parser.add_argument("--seed", default="101", help="map seed for headless runs")
+    parser.add_argument("--ticks", type=int, default=10000, help="ticks to simulate headless")
+    parser.add_argument("--traffic", type=int, default=TRAFFIC_COUNT, help="traffic cars for headless runs")
+    parser.add_argument("--map-size", type=generator.map_size_arg, default=MAP_SIZE, help="map cells per side for headless runs")
+    parser.add_argument("--driver", type=driver_spec, default="random",
+                        help='"random", "chase" or a script such as "U:120,UL:30,UR:30"')
+    parser.add_argument("--record", action="store_true", help="save every round as replay_<time>.rpl")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="play a recorded round, in the window or with --headless")
+    args = parser.parse_args()
+
+    if args.replay:
+        try:
+            if args.headless:
+                sys.exit(headless_replay(args.replay))
+            watch_replay(args.replay)
+        except (OSError, ReplayError) as e:
+            print(f"Cannot play replay: {e}")
+            sys.exit(1)
+    elif args.headless:
+        headless(args)
+    else:
+        main(args.profile, args.record)
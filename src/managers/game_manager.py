@@ -26,10 +26,11 @@
 
 import pygame
 from pygame.locals import *
-from random import randint
+import random
 
-from src.data import maps
-from src.core.loader import load_image, load_sound
+from src.core import generator
+from src.core.loader import load_image
+from src.core.sound_manager import sounds
 from src.core.settings import *
 
 # Constants now imported from settings
@@ -42,12 +43,14 @@ class Finish(pygame.sprite.Sprite):
     def claim_flag(self):
         self.score += FLAG_SCORE
         self.timeleft += COUNTDOWN_EXTEND
-        self.snd_score.play()
+        sounds.play('score.mp3')
         if self.text_manager:
             self.text_manager.add(self.rect.x, self.rect.y, f"+{FLAG_SCORE}", (255, 255, 0))
             self.text_manager.add(self.rect.x, self.rect.y - 30, f"+{COUNTDOWN_EXTEND}s", (0, 255, 0))
         if self.timeleft > COUNTDOWN_FULL:
             self.timeleft = COUNTDOWN_FULL
+        #Move to another cell, or the flag scores again while the car sits on it
+        self.generate_finish(exclude=self.cell)
 #The player has crashed into another vehicle, deduct some points.
     def car_crash(self):
         if (self.penalty_cool == 0):
@@ -55,14 +58,10 @@ class Finish(pygame.sprite.Sprite):
             self.penalty_cool = PENALTY_COOL
             if self.text_manager:
                 self.text_manager.add(self.x, self.y, f"{CRASH_PENALTY}", (255, 0, 0))
-#Find an adequate point to spawn flag.     
-    def generate_finish(self):
-        x = randint(0,9)
-        y = randint(0,9)
-        while (maps.map_1[y][x] == 5):
-            x = randint(0,9)
-            y = randint(0,9)
-            
+#Find an adequate point to spawn flag, other than the exclude cell.
+    def generate_finish(self, exclude = None):
+        x, y = self.cell = generator.random_cell(rng=self.rng, exclude=exclude)
+
         self.x = x * FULL_TILE + HALF_TILE
         self.y = y * FULL_TILE + HALF_TILE
         self.rect.topleft = self.x, self.y
@@ -70,6 +69,7 @@ class Finish(pygame.sprite.Sprite):
     def reset(self):
         self.timeleft = COUNTDOWN_FULL
         self.score = 0
+        self.penalty_cool = PENALTY_COOL
         self.generate_finish()
         self.high_score_reached = False
         
@@ -78,10 +78,11 @@ class Finish(pygame.sprite.Sprite):
         pygame.sprite.Sprite.__init__(self)
         self.image = load_image('finish.png', False)
         self.rect = self.image.get_rect()
-        self.snd_score = load_sound('score.mp3')
         self.x = 5
         self.y = 5
         self.penalty_cool = PENALTY_COOL
+        # Flag positions come from here, replays swap in their own generator
+        self.rng = random
         self.generate_finish()
         self.rect.topleft = self.x, self.y
         self.score = 0
@@ -98,10 +99,9 @@ class Finish(pygame.sprite.Sprite):
             
         if (self.timeleft > 0):
             self.timeleft -= 1
-        else:
-            # Game Over Logic check
-            if not self.high_score_reached:
-                if self.score_manager.save_high_score(self.score):
+            #Game over: save on this tick, the loop stops stepping once time is up
+            if (self.timeleft == 0):
+                self.high_score_reached = self.score_manager.save_high_score(self.score)
+                if self.high_score_reached:
                     print(f"New High Score Saved: {self.score}")
-                self.high_score_reached = True
         
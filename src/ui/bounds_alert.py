@@ -23,16 +23,31 @@
 #Camera module will keep track of sprite offset.
 
 #Alert shown when the car is outside the map.
-from src.core.loader import load_image, load_sound
+from src.core.loader import load_image
+from src.core.sound_manager import sounds
+from src.core.settings import FULL_TILE
+from src.data import maps
 import pygame
 from pygame.locals import *
 
 
 BOUND_MIN = 0
-BOUND_MAX = 1000 * 10
 NOTE_HALF_X = 211
 NOTE_HALF_Y = 112
 
+#Far edge of the current map.
+def bound_max():
+    return FULL_TILE * maps.size
+
+#check the bounds vs car coordinates.
+def breaking(car_x, car_y):
+    bound = bound_max()
+    if car_x < BOUND_MIN or car_x > bound:
+       return True
+    if (car_y < BOUND_MIN or car_y > bound):
+        return True
+    return False
+
 #alertbox.
 class Alert(pygame.sprite.Sprite):
 
@@ -43,19 +58,13 @@ class Alert(pygame.sprite.Sprite):
         self.x =  int(pygame.display.Info().current_w /2) - NOTE_HALF_X
         self.y =  int(pygame.display.Info().current_h /2) - NOTE_HALF_Y
         self.rect.topleft = self.x, self.y
-        self.snd_bump = load_sound('bump.mp3')
         self.screen = pygame.display.get_surface()
 
-    #check the bounds vs car coordinates.
     def breaking(self, car_x, car_y):
-        if car_x < BOUND_MIN or car_x > BOUND_MAX:
-           return True
-        if (car_y < BOUND_MIN or car_y > BOUND_MAX):
-            return True
-        return False
+        return breaking(car_x, car_y)
 
     def appear(self):
-        self.snd_bump.play()
+        sounds.play('bump.mp3')
         self.screen.blit(self.image, self.rect)
 
 
@@ -37,6 +37,9 @@ class TextManager:
         
     def add(self, x, y, text, color=(255, 255, 255)):
         self.group.add(FloatingText(x, y, text, color))
+
+    def clear(self):
+        self.group.empty()
         
     def update(self, cam_x, cam_y):
         # Floating texts are world objects but we render them.
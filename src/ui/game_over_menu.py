@@ -1,81 +1,45 @@
 
 import pygame
 from pygame.locals import *
-from src.core.settings import COLOR_BG, COLOR_TEXT
+from src.ui.widgets import MenuScreen, Label, Button
 
-class GameOverMenu:
+class GameOverMenu(MenuScreen):
     def __init__(self, screen, score, high_score_reached):
-        self.screen = screen
+        MenuScreen.__init__(self, screen, (50, 0, 0)) # Dark red tint
         self.score = score
         self.high_score_reached = high_score_reached
-        
+
         self.font = pygame.font.Font(None, 64)
         self.small_font = pygame.font.Font(None, 32)
-        
-        self.running = True
-        self.result = None # "RESTART", "MENU", "QUIT"
-        
+
+        self.result = "QUIT" # "RESTART", "MENU", "QUIT"
+
         self.layout_ui()
-        
+
     def layout_ui(self):
         center_w = self.screen.get_width() // 2
         center_h = self.screen.get_height() // 2
-        
-        self.btn_restart = pygame.Rect(center_w - 100, center_h + 20, 200, 50)
-        self.btn_menu = pygame.Rect(center_w - 100, center_h + 90, 200, 50)
-        self.btn_quit = pygame.Rect(center_w - 100, center_h + 160, 200, 50)
-        
-    def run(self):
-        clock = pygame.time.Clock()
-        
-        while self.running:
-            # Semi-transparent background over the game?
-            # Or just solid fill. Let's do solid fill for simplicity or overlay if we can.
-            # Since main loop stops rendering game, we need to redraw or just fill.
-            self.screen.fill((50, 0, 0)) # Dark red tint
-            
-            # Events
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    return "QUIT"
-                if event.type == KEYDOWN:
-                    if event.key == K_ESCAPE:
-                        return "MENU" 
-                if event.type == MOUSEBUTTONDOWN:
-                    if self.btn_restart.collidepoint(event.pos):
-                        return "RESTART"
-                    if self.btn_menu.collidepoint(event.pos):
-                        return "MENU"
-                    if self.btn_quit.collidepoint(event.pos):
-                        return "QUIT"
 
-            cx = self.screen.get_width() // 2
-            cy = self.screen.get_height() // 2
+        self.widgets = []
+        self.add(Label(self.font, "GAME OVER", (255, 50, 50), center=(center_w, center_h - 100)))
+        self.add(Label(self.small_font, f"Final Score: {self.score}", (255, 255, 255), center=(center_w, center_h - 40)))
+        if self.high_score_reached:
+            self.add(Label(self.small_font, "NEW HIGH SCORE!", (255, 215, 0), center=(center_w, center_h - 10)))
 
-            # Title
-            title = self.font.render("GAME OVER", True, (255, 50, 50))
-            self.screen.blit(title, title.get_rect(center=(cx, cy - 100)))
-            
-            # Score
-            score_txt = self.small_font.render(f"Final Score: {self.score}", True, (255, 255, 255))
-            self.screen.blit(score_txt, score_txt.get_rect(center=(cx, cy - 40)))
-            
-            if self.high_score_reached:
-                hs_txt = self.small_font.render("NEW HIGH SCORE!", True, (255, 215, 0))
-                self.screen.blit(hs_txt, hs_txt.get_rect(center=(cx, cy - 10)))
-            
-            # Buttons
-            self.draw_btn(self.btn_restart, "PLAY AGAIN", (0, 100, 0))
-            self.draw_btn(self.btn_menu, "MAIN MENU", (50, 50, 100))
-            self.draw_btn(self.btn_quit, "QUIT", (100, 0, 0))
-            
-            pygame.display.flip()
-            clock.tick(30)
-            
-        return "QUIT"
+        self.btn_restart = self.add(Button((center_w - 100, center_h + 20, 200, 50), self.small_font, "PLAY AGAIN", (0, 100, 0)))
+        self.btn_menu = self.add(Button((center_w - 100, center_h + 90, 200, 50), self.small_font, "MAIN MENU", (50, 50, 100)))
+        self.btn_quit = self.add(Button((center_w - 100, center_h + 160, 200, 50), self.small_font, "QUIT", (100, 0, 0)))
 
-    def draw_btn(self, rect, text, bg_color):
-        pygame.draw.rect(self.screen, bg_color, rect)
-        pygame.draw.rect(self.screen, COLOR_TEXT, rect, 2)
-        txt = self.small_font.render(text, True, (255, 255, 255))
-        self.screen.blit(txt, txt.get_rect(center=rect.center))
+    def handle_event(self, event):
+        if event.type == QUIT:
+            self.close("QUIT")
+        elif event.type == KEYDOWN:
+            if event.key == K_ESCAPE:
+                self.close("MENU")
+        elif event.type == MOUSEBUTTONDOWN:
+            if self.btn_restart.collidepoint(event.pos):
+                self.close("RESTART")
+            elif self.btn_menu.collidepoint(event.pos):
+                self.close("MENU")
+            elif self.btn_quit.collidepoint(event.pos):
+                self.close("QUIT")
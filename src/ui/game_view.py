@@ -0,0 +1,79 @@
+
+"""
+Draws a Simulation: map, sprites, floating text, HUD and overlays.
+Shared by the windowed game and the render benchmarks.
+"""
+
+import pygame
+from pygame.locals import *
+
+from src.core.loader import load_image
+from src.core.tile_renderer import TileRenderer
+from src.core.chunk_cache import ChunkCache
+from src.core.profiler import FrameProfiler
+from src.data import maps
+from src.entities.tracks import TrackLayer
+from src.ui.hud import Hud
+from src.ui import pointer, menu, bounds_alert
+
+class GameView:
+    def __init__(self, sim, resolution, text_manager = None, profiler = None):
+        self.sim = sim
+        self.resolution = resolution
+        self.text_manager = text_manager
+        self.profiler = profiler or FrameProfiler()
+
+        self.hud = Hud()
+        self.bound_alert = bounds_alert.Alert()
+        self.info = menu.Alert()
+        self.pointer = pointer.Tracker(resolution[0], resolution[1])
+        self.tracks = sim.tracks = TrackLayer()
+
+        # create sprite groups.
+        self.player_s  = pygame.sprite.Group(sim.car)
+        self.target_s  = pygame.sprite.Group(sim.target)
+        self.pointer_s = pygame.sprite.Group(self.pointer)
+
+        # generate tiles
+        tile_images = [load_image(tile_name, False) for tile_name in maps.map_tile]
+        self.background = ChunkCache(TileRenderer(tile_images), resolution)
+
+    #Draw the current state, alpha of the way from the previous tick.
+    def draw(self, screen, alpha = 1.0, show_info = False):
+        sim = self.sim
+        car, target = sim.car, sim.target
+        profiler = self.profiler
+
+        cam_x, cam_y = sim.view(alpha)
+        sim.traffic.sync(cam_x, cam_y, self.resolution[0], self.resolution[1], alpha)
+        target.rect.topleft = target.x - cam_x, target.y - cam_y
+        self.pointer_s.update(car.x, car.y, target.x, target.y)
+        profiler.mark("sprites")
+
+        # The chunk cache covers the whole view, no need to clear first.
+        self.background.draw(screen, cam_x, cam_y)
+        self.tracks.draw(screen, cam_x, cam_y) # overlay tracks
+        profiler.mark("map")
+
+        self.target_s.draw(screen)
+        self.player_s.draw(screen)
+        sim.traffic.group.draw(screen)
+        self.pointer_s.draw(screen)
+        profiler.mark("sprites")
+
+        # Floating Text
+        if self.text_manager:
+            self.text_manager.draw(screen, cam_x, cam_y)
+
+        # UI Overlays
+        self.hud.update(target)
+        self.hud.draw(screen)
+        profiler.mark("text")
+
+        if sim.out_of_bounds:
+            self.bound_alert.appear()
+
+        # Info overlay while M is held
+        if show_info:
+            self.info.appear()
+        profiler.draw(screen)
@@ -0,0 +1,56 @@
+
+import pygame
+from pygame.locals import *
+from src.core.settings import COLOR_TEXT, TICK_RATE
+
+GLYPHS = "0123456789-"
+
+#One "Label: value" line of the HUD.
+#The label and digit glyphs are rendered once; the composed surface is
+#rebuilt only when the value changes.
+class HudField:
+    def __init__(self, label, glyphs, pos, color):
+        self.label = label
+        self.color = color
+        self.glyphs = glyphs
+        self.pos = pos
+        self.value = None
+        self.image = None
+
+    def set(self, value):
+        if value == self.value:
+            return
+        self.value = value
+        digits = [self.glyphs[ch] for ch in str(value)]
+        width = self.label.get_width() + sum(glyph.get_width() for glyph in digits)
+        height = max([self.label.get_height()] + [glyph.get_height() for glyph in digits])
+
+        self.image = pygame.Surface((width, height), SRCALPHA)
+        self.image.fill(tuple(self.color) + (0,)) # keep antialiased edges the text colour
+        self.image.blit(self.label, (0, 0))
+        x = self.label.get_width()
+        for glyph in digits:
+            self.image.blit(glyph, (x, 0))
+            x += glyph.get_width()
+
+    def draw(self, screen):
+        if self.image is not None:
+            screen.blit(self.image, self.pos)
+
+#Score and time overlay.
+class Hud:
+    def __init__(self, size = 24, color = COLOR_TEXT):
+        self.font = pygame.font.Font(None, size)
+        glyphs = dict((ch, self.font.render(ch, True, color)) for ch in GLYPHS)
+
+        self.score = HudField(self.font.render('Score: ', True, color), glyphs, (20, 20), color)
+        self.time = HudField(self.font.render('Time: ', True, color), glyphs, (20, 50), color)
+
+    #Pick up the current score and countdown from the Finish object.
+    def update(self, target):
+        self.score.set(target.score)
+        self.time.set(int(target.timeleft / TICK_RATE))
+
+    def draw(self, screen):
+        self.score.draw(screen)
+        self.time.draw(screen)
@@ -1,72 +1,37 @@
 
 import pygame
 from pygame.locals import *
-from src.core.settings import COLOR_BG, COLOR_TEXT
+from src.core.settings import COLOR_TEXT
+from src.ui.widgets import MenuScreen, Label, Button
 
-class PauseMenu:
+class PauseMenu(MenuScreen):
     def __init__(self, screen):
-        self.screen = screen
+        MenuScreen.__init__(self, screen, (50, 50, 50))
         self.font = pygame.font.Font(None, 64)
         self.small_font = pygame.font.Font(None, 32)
-        
+
         self.layout_ui()
-        
+
     def layout_ui(self):
         center_w = self.screen.get_width() // 2
         center_h = self.screen.get_height() // 2
-        
-        self.btn_resume = pygame.Rect(center_w - 100, center_h - 30, 200, 50)
-        self.btn_menu = pygame.Rect(center_w - 100, center_h + 40, 200, 50)
-        self.btn_quit = pygame.Rect(center_w - 100, center_h + 110, 200, 50)
-        
-    def run(self):
-        # We need to capture the current screen to use as background if we want "overlay" effect.
-        # But for simplicity, we'll just fill a semi-transparent surface or simple color.
-        
-        overlay = pygame.Surface((self.screen.get_width(), self.screen.get_height()))
-        overlay.set_alpha(128)
-        overlay.fill((0, 0, 0))
-        self.screen.blit(overlay, (0,0))
-        
-        running = True
-        while running:
-            # Events
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    return "QUIT"
-                if event.type == KEYDOWN:
-                    if event.key == K_ESCAPE:
-                        return "RESUME" # Toggle back
-                if event.type == MOUSEBUTTONDOWN:
-                    if self.btn_resume.collidepoint(event.pos):
-                        return "RESUME"
-                    if self.btn_menu.collidepoint(event.pos):
-                        return "MENU"
-                    if self.btn_quit.collidepoint(event.pos):
-                        return "QUIT"
-            
-            # Draw UI on top of existing screen (which we blitted only once? No, need to re-blit if we clear?)
-            # Actually, standard Pygame loop clears screen.
-            # So let's just draw a solid Pause Screen for stability.
-            self.screen.fill((50, 50, 50)) 
-            
-            cx = self.screen.get_width() // 2
-            cy = self.screen.get_height() // 2
 
-            title = self.font.render("PAUSED", True, COLOR_TEXT)
-            self.screen.blit(title, title.get_rect(center=(cx, cy - 100)))
-            
-            self.draw_btn(self.btn_resume, "RESUME", (0, 100, 0))
-            self.draw_btn(self.btn_menu, "MAIN MENU", (50, 50, 100))
-            self.draw_btn(self.btn_quit, "QUIT", (100, 0, 0))
-            
-            pygame.display.flip()
-            pygame.time.Clock().tick(30)
-            
-        return "QUIT"
+        self.widgets = []
+        self.title = self.add(Label(self.font, "PAUSED", COLOR_TEXT, center=(center_w, center_h - 100)))
+        self.btn_resume = self.add(Button((center_w - 100, center_h - 30, 200, 50), self.small_font, "RESUME", (0, 100, 0)))
+        self.btn_menu = self.add(Button((center_w - 100, center_h + 40, 200, 50), self.small_font, "MAIN MENU", (50, 50, 100)))
+        self.btn_quit = self.add(Button((center_w - 100, center_h + 110, 200, 50), self.small_font, "QUIT", (100, 0, 0)))
 
-    def draw_btn(self, rect, text, bg_color):
-        pygame.draw.rect(self.screen, bg_color, rect)
-        pygame.draw.rect(self.screen, COLOR_TEXT, rect, 2)
-        txt = self.small_font.render(text, True, (255, 255, 255))
-        self.screen.blit(txt, txt.get_rect(center=rect.center))
+    def handle_event(self, event):
+        if event.type == QUIT:
+            self.close("QUIT")
+        elif event.type == KEYDOWN:
+            if event.key == K_ESCAPE:
+                self.close("RESUME") # Toggle back
+        elif event.type == MOUSEBUTTONDOWN:
+            if self.btn_resume.collidepoint(event.pos):
+                self.close("RESUME")
+            elif self.btn_menu.collidepoint(event.pos):
+                self.close("MENU")
+            elif self.btn_quit.collidepoint(event.pos):
+                self.close("QUIT")
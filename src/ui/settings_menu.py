@@ -1,118 +1,86 @@
 import pygame
 from pygame.locals import *
 from src.core.settings import COLOR_BG, COLOR_TEXT
+from src.core.sound_manager import sounds
+from src.ui.widgets import MenuScreen, Label, Button
 
-class SettingsMenu:
+class SettingsMenu(MenuScreen):
     def __init__(self, screen, config_manager):
-        self.screen = screen
+        MenuScreen.__init__(self, screen, COLOR_BG)
         self.config_manager = config_manager
         self.font = pygame.font.Font(None, 48)
         self.small_font = pygame.font.Font(None, 32)
-        
-        self.running = True
+
         self.restart_required = False
-        
+
         self.layout_ui()
-        
+
     def layout_ui(self):
         center_w = self.screen.get_width() // 2
         center_h = self.screen.get_height() // 2
-        
+
         # Current Config
         self.current_res = self.config_manager.get("resolution")
         self.current_vol = self.config_manager.get("volume")
-        
+
         # UI Elements
-        self.lbl_res = self.small_font.render(f"Resolution: {self.current_res[0]}x{self.current_res[1]}", True, COLOR_TEXT)
-        self.btn_res_800 = pygame.Rect(center_w - 200, center_h - 100, 120, 40)
-        self.btn_res_1024 = pygame.Rect(center_w - 60, center_h - 100, 120, 40)
-        self.btn_res_1280 = pygame.Rect(center_w + 80, center_h - 100, 120, 40)
-        
-        self.lbl_vol = self.small_font.render(f"Volume: {int(self.current_vol*100)}%", True, COLOR_TEXT)
-        self.btn_vol_down = pygame.Rect(center_w - 100, center_h, 50, 40)
-        self.btn_vol_up = pygame.Rect(center_w + 50, center_h, 50, 40)
-        
-        self.btn_back = pygame.Rect(center_w - 75, center_h + 100, 150, 50)
-        
+        self.widgets = []
+        self.add(Label(self.font, "Settings", COLOR_TEXT, center=(center_w, 50)))
+
+        self.btn_res_800 = self.add(Button((center_w - 200, center_h - 100, 120, 40), self.small_font, "800x600", (50, 50, 50)))
+        self.btn_res_1024 = self.add(Button((center_w - 60, center_h - 100, 120, 40), self.small_font, "1024x768", (50, 50, 50)))
+        self.btn_res_1280 = self.add(Button((center_w + 80, center_h - 100, 120, 40), self.small_font, "1280x720", (50, 50, 50)))
+        self.lbl_res = self.add(Label(self.small_font, self.res_text(), COLOR_TEXT, topleft=(center_w - 100, self.btn_res_800.rect.y - 40)))
+
+        self.btn_vol_down = self.add(Button((center_w - 100, center_h, 50, 40), self.small_font, "-", (50, 50, 50)))
+        self.btn_vol_up = self.add(Button((center_w + 50, center_h, 50, 40), self.small_font, "+", (50, 50, 50)))
+        self.lbl_vol = self.add(Label(self.small_font, self.vol_text(), COLOR_TEXT, topleft=(center_w - 60, self.btn_vol_down.rect.y - 40)))
+
+        self.btn_back = self.add(Button((center_w - 75, center_h + 100, 150, 50), self.small_font, "BACK", (50, 50, 50)))
+
         # Restart warning
-        self.lbl_restart = self.small_font.render("Restart required for Resolution changes", True, (255, 100, 100))
-
-    def run(self):
-        clock = pygame.time.Clock()
-        
-        while self.running:
-            self.screen.fill(COLOR_BG)
-            
-            # Events
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    return "QUIT"
-                if event.type == KEYDOWN:
-                    if event.key == K_ESCAPE:
-                        self.running = False
-                
-                if event.type == MOUSEBUTTONDOWN:
-                    # Resolution
-                    new_res = None
-                    if self.btn_res_800.collidepoint(event.pos): new_res = [800, 600]
-                    elif self.btn_res_1024.collidepoint(event.pos): new_res = [1024, 768]
-                    elif self.btn_res_1280.collidepoint(event.pos): new_res = [1280, 720]
-                    
-                    if new_res:
-                        self.config_manager.save_config("resolution", new_res)
-                        self.current_res = new_res
-                        self.restart_required = True
-                        self.layout_ui() # Refresh labels
-                        
-                    # Volume
-                    new_vol = self.current_vol
-                    if self.btn_vol_down.collidepoint(event.pos): new_vol = max(0.0, self.current_vol - 0.1)
-                    elif self.btn_vol_up.collidepoint(event.pos): new_vol = min(1.0, self.current_vol + 0.1)
-                    
-                    if new_vol != self.current_vol:
-                        self.current_vol = new_vol
-                        self.config_manager.save_config("volume", self.current_vol)
-                        if pygame.mixer and pygame.mixer.get_init():
-                            # Update all channels? Or just master if possible? Pygame sound volume works per sound obj usually.
-                            # For simplicity we assume calling code will check config, but let's try to set it roughly?
-                            pass
-                        self.layout_ui()
-                        
-                    # Back
-                    if self.btn_back.collidepoint(event.pos):
-                        self.running = False
-
-            # Render
-            cx = self.screen.get_width() // 2
-            
-            # Title
-            title = self.font.render("Settings", True, COLOR_TEXT)
-            self.screen.blit(title, title.get_rect(center=(cx, 50)))
-            
+        self.lbl_restart = self.add(Label(self.small_font, "Restart required for Resolution changes", (255, 100, 100),
+                                          center=(center_w, self.btn_res_800.rect.y - 70)))
+        self.lbl_restart.set_visible(self.restart_required)
+
+    def res_text(self):
+        return f"Resolution: {self.current_res[0]}x{self.current_res[1]}"
+
+    def vol_text(self):
+        return f"Volume: {int(self.current_vol*100)}%"
+
+    def handle_event(self, event):
+        if event.type == QUIT:
+            self.close("QUIT")
+        elif event.type == KEYDOWN:
+            if event.key == K_ESCAPE:
+                self.close(self.restart_required)
+
+        elif event.type == MOUSEBUTTONDOWN:
             # Resolution
-            self.screen.blit(self.lbl_res, (cx - 100, self.btn_res_800.y - 40))
-            self.draw_btn(self.btn_res_800, "800x600")
-            self.draw_btn(self.btn_res_1024, "1024x768")
-            self.draw_btn(self.btn_res_1280, "1280x720")
-            
-            if self.restart_required:
-                self.screen.blit(self.lbl_restart, self.lbl_restart.get_rect(center=(cx, self.btn_res_800.y - 70)))
-            
+            new_res = None
+            if self.btn_res_800.collidepoint(event.pos): new_res = [800, 600]
+            elif self.btn_res_1024.collidepoint(event.pos): new_res = [1024, 768]
+            elif self.btn_res_1280.collidepoint(event.pos): new_res = [1280, 720]
+
+            if new_res:
+                self.config_manager.save_config("resolution", new_res)
+                self.current_res = new_res
+                self.restart_required = True
+                self.lbl_res.set_text(self.res_text())
+                self.lbl_restart.set_visible(True)
+
             # Volume
-            self.screen.blit(self.lbl_vol, (cx - 60, self.btn_vol_down.y - 40))
-            self.draw_btn(self.btn_vol_down, "-")
-            self.draw_btn(self.btn_vol_up, "+")
-            
+            new_vol = self.current_vol
+            if self.btn_vol_down.collidepoint(event.pos): new_vol = max(0.0, self.current_vol - 0.1)
+            elif self.btn_vol_up.collidepoint(event.pos): new_vol = min(1.0, self.current_vol + 0.1)
+
+            if new_vol != self.current_vol:
+                self.current_vol = new_vol
+                self.config_manager.save_config("volume", self.current_vol)
+                sounds.set_volume(self.current_vol)
+                self.lbl_vol.set_text(self.vol_text())
+
             # Back
-            self.draw_btn(self.btn_back, "BACK")
-            
-            pygame.display.flip()
-            clock.tick(30)
-            
-        return self.restart_required
-
-    def draw_btn(self, rect, text):
-        pygame.draw.rect(self.screen, (50, 50, 50), rect)
-        pygame.draw.rect(self.screen, COLOR_TEXT, rect, 2)
-        txt_surf = self.small_font.render(text, True, (255, 255, 255))
-        self.screen.blit(txt_surf, txt_surf.get_rect(center=rect.center))
+            if self.btn_back.collidepoint(event.pos):
+                self.close(self.restart_required)
@@ -0,0 +1,172 @@
+
+import pygame
+from pygame.locals import *
+from src.core.settings import COLOR_TEXT
+
+IDLE_TIMEOUT = 500 # ms to block on the event queue before calling tick()
+
+#Base class for retained-mode menu widgets.
+#A widget keeps its rendered surfaces and only asks to be redrawn
+#when something about it changes.
+class Widget:
+    def __init__(self, rect):
+        self.rect = pygame.Rect(rect)
+        self.visible = True
+        self.dirty = True
+        self.old_rect = None
+
+    #Flag the widget for redraw, remembering the area it covered before.
+    def mark_dirty(self):
+        if not self.dirty:
+            self.old_rect = self.rect.copy()
+        self.dirty = True
+
+    def set_visible(self, visible):
+        if visible != self.visible:
+            self.mark_dirty()
+            self.visible = visible
+
+    #Screen area that must be repainted for this widget.
+    def dirty_rect(self):
+        if self.old_rect is not None:
+            return self.rect.union(self.old_rect)
+        return self.rect.copy()
+
+    def draw(self, surface):
+        pass
+
+#Pre-rendered line of text.
+class Label(Widget):
+    def __init__(self, font, text, color, center = None, topleft = None):
+        self.font = font
+        self.text = text
+        self.color = color
+        self.anchor = ('center', center) if center is not None else ('topleft', topleft)
+        self.image = font.render(text, True, color)
+        Widget.__init__(self, self.image.get_rect(**{self.anchor[0]: self.anchor[1]}))
+
+    #Re-render only if the text or colour actually changed.
+    def set_text(self, text, color = None):
+        color = color or self.color
+        if text == self.text and color == self.color:
+            return
+        self.mark_dirty()
+        self.text = text
+        self.color = color
+        self.image = self.font.render(text, True, color)
+        self.rect = self.image.get_rect(**{self.anchor[0]: self.anchor[1]})
+
+    def draw(self, surface):
+        surface.blit(self.image, self.rect)
+
+#Filled box with a border and centred caption.
+#Also used for the seed input box.
+class Button(Widget):
+    def __init__(self, rect, font, text, bg_color, text_color = (255, 255, 255)):
+        Widget.__init__(self, rect)
+        self.font = font
+        self.text = text
+        self.bg_color = bg_color
+        self.text_color = text_color
+        self.render()
+
+    def render(self):
+        self.image = self.font.render(self.text, True, self.text_color)
+
+    def set_text(self, text, text_color = None):
+        text_color = text_color or self.text_color
+        if text == self.text and text_color == self.text_color:
+            return
+        self.mark_dirty()
+        self.text = text
+        self.text_color = text_color
+        self.render()
+
+    def set_bg(self, bg_color):
+        if bg_color != self.bg_color:
+            self.mark_dirty()
+            self.bg_color = bg_color
+
+    def collidepoint(self, pos):
+        return self.visible and self.rect.collidepoint(pos)
+
+    def draw(self, surface):
+        pygame.draw.rect(surface, self.bg_color, self.rect)
+        pygame.draw.rect(surface, COLOR_TEXT, self.rect, 2)
+        surface.blit(self.image, self.image.get_rect(center = self.rect.center))
+
+#Event-driven menu loop.
+#The screen is painted in full once, after that only the rects of dirty
+#widgets are pushed with display.update(). While nothing happens the loop
+#sleeps in pygame.event.wait, so an open menu costs next to no CPU.
+class MenuScreen:
+    def __init__(self, screen, bg_color):
+        self.screen = screen
+        self.bg_color = bg_color
+        self.widgets = []
+        self.running = True
+        self.result = None
+        self.full_redraw = True
+        self.idle_timeout = IDLE_TIMEOUT
+
+    def add(self, widget):
+        self.widgets.append(widget)
+        return widget
+
+    #Repaint everything on the next refresh, e.g. after a sub-menu.
+    def invalidate(self):
+        self.full_redraw = True
+
+    #Leave the loop, run() returns result.
+    def close(self, result):
+        self.result = result
+        self.running = False
+
+    #Handle a single event. Subclasses override this.
+    def handle_event(self, event):
+        pass
+
+    #Called at least every idle_timeout ms, even without events.
+    def tick(self):
+        pass
+
+    def refresh(self):
+        if self.full_redraw:
+            self.screen.fill(self.bg_color)
+            for widget in self.widgets:
+                if widget.visible:
+                    widget.draw(self.screen)
+                widget.dirty = False
+                widget.old_rect = None
+            self.full_redraw = False
+            pygame.display.flip()
+            return
+
+        rects = []
+        for widget in self.widgets:
+            if widget.dirty:
+                rects.append(widget.dirty_rect())
+                widget.dirty = False
+                widget.old_rect = None
+        if not rects:
+            return
+
+        for rect in rects:
+            self.screen.fill(self.bg_color, rect)
+        for widget in self.widgets:
+            if widget.visible and widget.rect.collidelist(rects) != -1:
+                widget.draw(self.screen)
+        pygame.display.update(rects)
+
+    def run(self):
+        self.invalidate()
+        while self.running:
+            self.refresh()
+            event = pygame.event.wait(self.idle_timeout)
+            events = [event] + pygame.event.get() if event.type != NOEVENT else []
+            for event in events:
+                self.handle_event(event)
+                if not self.running:
+                    break
+            self.tick()
+        return self.result
@@ -0,0 +1,104 @@
+
+"""
+Play many seeds headless in parallel and compare the results.
+
+Every combination of seed, driver and --set values is one job; jobs are
+spread over one worker process per core. Results are grouped by driver
+and settings, so sweeping a constant shows its effect side by side.
+
+Run from the project root:
+    python tools/batch.py --count 20 --drivers chase random
+    python tools/batch.py --seeds 101 202 303 --set CRASH_PENALTY=-2,-5 --set COUNTDOWN_EXTEND=500,750
+    python tools/batch.py --count 50 --drivers chase --set TRAFFIC_COUNT=45,200 --output batch.json
+"""
+
+import os
+import sys
+import ast
+import json
+import argparse
+import itertools
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.core import batch, generator
+from src.core.drivers import driver_spec
+from src.core.settings import MAP_SIZE
+
+#"NAME=1,2,3" as (NAME, [1, 2, 3]).
+def parse_setting(text):
+    name, _, values = text.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE[,VALUE...], got {text}")
+    try:
+        return name.strip(), [ast.literal_eval(v.strip()) for v in values.split(",")]
+    except (ValueError, SyntaxError):
+        raise argparse.ArgumentTypeError(f"bad value in {text}")
+
+#The seeds given, or seeds 1 to count.
+def parse_seeds(values, count):
+    if values:
+        return values
+    return [str(i) for i in range(1, count + 1)]
+
+def override_sets(settings):
+    names = [name for name, _ in settings]
+    return [dict(zip(names, combo)) for combo in itertools.product(*[v for _, v in settings])]
+
+def report(summary, groups, failures, jobs):
+    print(f"{'driver':<10}{'traffic':>8}{'jobs':>6}{'flags/job':>11}{'crashes/job':>13}"
+          f"{'score/round':>13}{'off-road':>10}{'ticks/s':>10}  settings")
+    for (driver, traffic, overrides), group in sorted(groups.items()):
+        print(f"{driver[:10]:<10}{traffic:>8}{group['jobs']:>6}{group['flags_per_job']:>11.2f}"
+              f"{group['crashes_per_job']:>13.2f}{group['score_per_round']:>13.1f}"
+              f"{group['offroad_fraction']:>9.1%}{group['ticks_per_second']:>10.0f}  {overrides or '-'}")
+    for i, error in sorted(failures.items()):
+        print(f"FAILED seed {jobs[i].seed} {jobs[i].driver}: {error}")
+    print(f"\n{summary['jobs']} jobs, {summary['failed']} failed, {summary['ticks']} ticks in "
+          f"{summary['wall_seconds']:.1f}s ({summary['ticks_per_second']:.0f} ticks/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    seeds = parser.add_mutually_exclusive_group()
+    seeds.add_argument("--seeds", nargs="+", help="seeds to play")
+    seeds.add_argument("--count", type=int, default=10, help="play seeds 1..COUNT (default: 10)")
+    parser.add_argument("--drivers", nargs="+", type=driver_spec, default=["chase"],
+                        help='"chase", "random" or scripts such as "U:120,UL:30"')
+    parser.add_argument("--ticks", type=int, default=3600, help="ticks per job")
+    parser.add_argument("--map-size", type=generator.map_size_arg, default=MAP_SIZE)
+    parser.add_argument("--set", type=parse_setting, action="append", default=[], metavar="NAME=V1,V2",
+                        help="override a settings.py constant, every value is tried")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: cores)")
+    parser.add_argument("--retries", type=int, default=1, help="retries for jobs whose worker died")
+    parser.add_argument("--output", help="write the grouped results as JSON")
+    args = parser.parse_args()
+    if args.count < 1:
+        parser.error("--count must be at least 1")
+
+    try:
+        jobs = batch.make_jobs(parse_seeds(args.seeds, args.count), args.drivers, args.ticks,
+                               override_sets(args.set), map_size=args.map_size)
+    except ValueError as e:
+        parser.error(str(e))
+
+    def progress(done, total):
+        print(f"\r{done}/{total} jobs", end="", flush=True)
+    summary, groups, failures = batch.run(jobs, args.workers, args.retries, progress)
+    print()
+    report(summary, groups, failures, jobs)
+
+    if args.output:
+        document = {"summary": summary,
+                    "groups": [dict(group, driver=key[0], traffic_count=key[1], settings=key[2])
+                               for key, group in sorted(groups.items())],
+                    "failures": [{"seed": jobs[i].seed, "driver": jobs[i].driver,
+                                  "settings": jobs[i].key()[2], "error": error}
+                                 for i, error in sorted(failures.items())]}
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+
+"""
+Score the maps of many seeds and keep the best ones.
+
+Maps are built with generator.grow_maps, exactly as the game builds them,
+and scored by src/core/map_quality.py (coverage, connected networks,
+dead ends, area reachable from the middle). Seed ranges are spread over
+one worker process per core, and the current top N is rewritten to the
+output file after every chunk, so a long sweep can be stopped at any
+time. Good seeds can go into LEVEL_PROFILES in settings.py.
+
+Run from the project root:
+    python tools/seed_sweep.py --count 100000
+    python tools/seed_sweep.py --start 1000000 --count 5000000 --top 50 --output best_seeds.csv
+    python tools/seed_sweep.py --count 2000 --size 64
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.core import generator, map_quality
+from src.core.settings import MAP_SIZE
+
+#Replace path with the ranking, through a temporary file so a reader
+#never sees half of it.
+def write_ranking(path, best):
+    temp = f"{path}.tmp"
+    with open(temp, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("rank", "seed") + map_quality.METRICS)
+        for rank, (seed, metrics) in enumerate(best, 1):
+            writer.writerow([rank, seed] + [f"{metrics[name]:.6g}" for name in map_quality.METRICS])
+    os.replace(temp, path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--start", type=int, default=0, help="first seed")
+    parser.add_argument("--count", type=int, default=100000, help="seeds to score")
+    parser.add_argument("--size", type=generator.map_size_arg, default=MAP_SIZE, help="map cells per side")
+    parser.add_argument("--top", type=int, default=100, help="best maps to keep")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: cores)")
+    parser.add_argument("--chunk", type=int, default=None, help="seeds per worker task")
+    parser.add_argument("--output", default="best_seeds.csv")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    def on_chunk(best, done):
+        write_ranking(args.output, best)
+        rate = done / (time.perf_counter() - start)
+        print(f"\r{done}/{args.count} seeds ({rate:.0f}/s), best {best[0][0]} "
+              f"score {best[0][1]['score']:.4f}", end="", flush=True)
+
+    best = map_quality.sweep(args.start, args.count, args.size, args.top,
+                             args.workers, args.chunk, on_chunk)
+    print()
+    for rank, (seed, metrics) in enumerate(best[:10], 1):
+        print(f"{rank:>3}. seed {seed:<10} score {metrics['score']:.4f}  "
+              f"reachable {metrics['reachable']:.1%}  dead ends {metrics['dead_end_ratio']:.1%}  "
+              f"loops {metrics['loops']:.3f}")
+    print(f"Top {len(best)} written to {args.output}")
+
+if __name__ == '__main__':
+    sys.exit(main())